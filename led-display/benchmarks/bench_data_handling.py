@@ -0,0 +1,66 @@
+'''
+Hot paths of `data_handling`, each timed on one cycle.
+'''
+
+import numpy as np
+
+from data_handling.data_filter import DataFilter
+from data_handling.time_intervals import TimeInterval
+from data_handling.integrate import integrate_data, integrate_windows
+from data_handling.energy_ramp import synchrotron_kinetic_energy
+from data_handling.settings import Settings
+from data_handling.pipeline import Frame, Pipeline
+from data_handling.topology import ring
+from data_handling import integrate_detemine
+
+
+def bench_filter(benchmark, frame):
+  filterer = DataFilter(invert = True, scale = 2, offset = 0.1, auto_offset = 1)
+  benchmark(filterer.apply, frame)
+
+
+def bench_interval_apply(benchmark, frame):
+  interval = TimeInterval()
+  interval.set_intervals([-0.5, 0, 2.5, 5, 7.5, 10.5])
+  benchmark(interval.apply, frame)
+
+
+def bench_interval_sum_times(benchmark, frame):
+  interval = TimeInterval()
+  pairs = interval.set_intervals([-0.5, 0, 2.5, 5, 7.5, 10.5])
+  benchmark(lambda: [interval.sum_times(frame, i, pairs) for i in range(len(frame))])
+
+
+def bench_integrate_data(benchmark, frame):
+  benchmark(integrate_data, frame)
+
+
+def bench_integrate_windows(benchmark, frame):
+  interval = TimeInterval()
+  starts, stops = interval.indices(np.full(len(frame), 0.0), np.full(len(frame), 10.0))
+  benchmark(integrate_windows, frame, starts, stops, dx = interval.step)
+
+
+def bench_pipeline(benchmark, frame):
+  pipeline = Pipeline.default(Settings(auto_offset = 1))
+  benchmark(lambda: pipeline(Frame(frame)))
+
+
+def bench_lv5judge(benchmark, frame):
+  benchmark(integrate_detemine.lv5judge, frame, -0.05, 0.008, "v")
+
+
+def bench_live_int(benchmark, frame):
+  benchmark(integrate_detemine.live_int, frame, "p")
+
+
+def bench_live_int_row(benchmark, frame):
+  benchmark(integrate_detemine.live_int_row, frame, "p")
+
+
+def bench_calibration_curve(benchmark):
+  benchmark(integrate_detemine.calibration_curve_beta, t_min = ring.start, t_max = ring.end, data_points = ring.points)
+
+
+def bench_energy_ramp(benchmark):
+  benchmark(synchrotron_kinetic_energy, 800, ring.time, unit = "MeV")
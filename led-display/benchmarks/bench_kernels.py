@@ -0,0 +1,34 @@
+'''
+The fused integrate-and-classify kernel, against the staged pipeline it replaces.
+'''
+
+import pytest
+
+from data_handling.settings import Settings
+from data_handling.pipeline import Frame, Pipeline
+from data_handling.kernels import compiled
+
+
+@pytest.fixture
+def settings():
+  return Settings(invert = True, scale = 2, auto_offset = 1)
+
+
+def bench_staged(benchmark, frame, settings):
+  pipeline = Pipeline.default(settings)
+  benchmark(lambda: pipeline(Frame(frame)))
+
+
+def bench_fused_numpy(benchmark, frame, settings):
+  pipeline = Pipeline.default(settings, fused = True)
+  pipeline.stages[-1].jit = False
+  benchmark(lambda: pipeline(Frame(frame)))
+
+
+def bench_fused_numba(benchmark, frame, settings):
+  if compiled() is None:
+    pytest.skip("Numba isn't installed")
+
+  pipeline = Pipeline.default(settings, fused = True)
+  pipeline(Frame(frame))  # compile outside the timings
+  benchmark(lambda: pipeline(Frame(frame)))
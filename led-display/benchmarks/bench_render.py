@@ -0,0 +1,133 @@
+'''
+Wall time of a full LED and menu refresh of the GUI, rendered offscreen so it runs on a headless machine.
+
+Each benchmark refreshes with a sequence of precomputed result frames, under each renderer in `config.leds.renderer`.
+`bench_alarms` refreshes as each cycle does, with channels hovering about a threshold, with and without debouncing their alarms.
+`bench_waveform` hands a processed frame to the waveform plot and repaints it, with traces of 1 and 4 selected channels,
+at its configured width and at half of it, where traces are drawn as fewer envelope points.
+'''
+
+import os
+
+from itertools import cycle
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import numpy as np
+import pytest
+
+from PyQt5 import QtWidgets as qw
+
+import main
+
+from data_handling.alarms import Alarms
+from data_handling.classify import classify
+from data_handling.pipeline import Frame
+
+
+@pytest.fixture(scope = "module")
+def core():
+  app = qw.QApplication.instance() or qw.QApplication([])
+  main.config.events.path = None
+  core = main.Core(None)
+  core.show()
+  app.processEvents()
+
+  main.config.connected = True
+  yield core
+
+  main.config.connected = False
+  core.close()
+
+
+def results(count: int, *, changing: float, seed = 0) -> list[np.ndarray]:
+  '''Integrals for `count` frames, where a `changing` fraction of channels move between LED states each frame.'''
+
+  rng = np.random.default_rng(seed)
+  lower, upper = main.config.settings.thresholds()
+  levels = np.stack([lower - abs(lower), (lower + upper) / 2, upper + abs(upper)])
+
+  states = rng.integers(0, 3, len(lower))
+  out = []
+  for _ in range(count):
+    moved = rng.random(len(states)) < changing
+    states = np.where(moved, rng.integers(0, 3, len(states)), states)
+    out.append(levels[states, np.arange(len(states))])
+
+  return out
+
+
+def show(core, values: np.ndarray) -> None:
+  '''Sets the LEDs' alarm levels straight from `values`, as the renderers see them after any debouncing.'''
+
+  core.data = values
+  core.alarms.level = classify(values, main.config.settings.thresholds())
+
+
+@pytest.mark.parametrize("renderer", ["stylesheet", "cached"])
+@pytest.mark.parametrize("changing", [0.0, 0.1, 1.0], ids = ["steady", "some", "all"])
+def bench_update_all(benchmark, core, renderer, changing):
+  main.config.leds.renderer = renderer
+  frames = cycle(results(1000, changing = changing))
+
+  def refresh():
+    show(core, next(frames))
+    core.update_all()
+    qw.QApplication.processEvents()
+
+  refresh()
+  benchmark(refresh)
+
+
+@pytest.mark.parametrize("renderer", ["stylesheet", "cached"])
+def bench_update_leds(benchmark, core, renderer):
+  main.config.leds.renderer = renderer
+  frames = cycle(results(1000, changing = 0.1))
+
+  def refresh():
+    show(core, next(frames))
+    core.update_leds()
+    qw.QApplication.processEvents()
+
+  refresh()
+  benchmark(refresh)
+
+
+
+@pytest.mark.parametrize("debounce", [False, True], ids = ["raw", "debounced"])
+def bench_alarms(benchmark, core, debounce):
+  main.config.leds.renderer = "cached"
+  lower, upper = main.config.settings.thresholds()
+  rng = np.random.default_rng(0)
+  noise = np.abs(upper - lower) * 0.05
+  frames = cycle([upper + rng.normal(0, noise) for _ in range(1000)])
+
+  core.alarms = Alarms(len(lower), **({} if debounce else {"count": 1, "window": 1, "hysteresis": 0}))
+  core.data = next(frames)
+
+  def refresh():
+    core.update_leds(core.alarms.judge(next(frames), lower, upper))
+    qw.QApplication.processEvents()
+
+  refresh()
+  benchmark(refresh)
+
+
+@pytest.mark.parametrize("curves", [1, 4])
+@pytest.mark.parametrize("narrow", [False, True], ids = ["wide", "narrow"])
+def bench_waveform(benchmark, core, curves, narrow):
+  topology = main.config.topology
+  data = cycle([Frame(np.random.default_rng(seed).normal(size = topology.shape), time = topology.time) for seed in range(10)])
+  size = core.plot.size()
+  if narrow:
+    core.plot.resize(size.width() // 2, size.height())
+  core.plot.select(np.arange(curves))
+
+  def refresh():
+    core.plot.feed(next(data))
+    core.plot.refresh()
+    core.plot.repaint()
+
+  refresh()
+  benchmark(refresh)
+  core.plot.resize(size)
@@ -0,0 +1,47 @@
+'''
+Throughput of the pipeline as installations grow, single-threaded and sharded over threads.
+
+Run from `led-display` as `python -m benchmarks.channels [workers ...]`, by default timing 1, 2, 4 and 8 threads.
+Speedups are bounded by the CPUs available, which are reported alongside.
+'''
+
+import os
+import sys
+import timeit
+
+from data_handling.settings import Settings
+from data_handling.pipeline import Frame, Pipeline
+from data_handling.parallel import Sharded
+
+from .frames import synthetic
+
+
+def run(process, cycles, *, repeat = 5) -> float:
+  '''Best time per cycle of `process` over `cycles`.'''
+
+  process(Frame(cycles[0]))
+  return min(timeit.repeat(lambda: [process(Frame(each)) for each in cycles], number = 1, repeat = repeat)) / len(cycles)
+
+
+def main(*workers):
+  workers = [int(each) for each in workers] or [1, 2, 4, 8]
+  print(f"{os.cpu_count()} CPUs")
+  print(f"{'channels':>8} {'threads':>8} {'ms/cycle':>9} {'channels/s':>11} {'speedup':>8}")
+
+  for channels in (40, 400, 4000):
+    cycles = synthetic(3, channels = channels)
+    settings = Settings(channels, auto_offset = 1)
+
+    base = run(Pipeline.default(settings), cycles)
+    print(f"{channels:>8} {'-':>8} {base * 1e3:>9.3f} {channels / base:>11.3g} {1:>8.2f}")
+
+    for count in workers:
+      sharded = Sharded(lambda: Pipeline.default(settings), workers = count, block = 1)
+      seconds = run(sharded, cycles)
+      sharded.close()
+
+      print(f"{channels:>8} {count:>8} {seconds * 1e3:>9.3f} {channels / seconds:>11.3g} {base / seconds:>8.2f}")
+
+
+if __name__ == "__main__":
+  main(*sys.argv[1:])
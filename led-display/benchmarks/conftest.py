@@ -0,0 +1,30 @@
+'''
+Benchmarks of the `data_handling` hot paths, using pytest-benchmark.
+
+Run from `led-display`:
+  python -m pytest benchmarks --benchmark-autosave                          save a JSON baseline
+  python -m pytest benchmarks --benchmark-compare --benchmark-compare-fail=mean:10%   fail on regressions against it
+  python -m pytest benchmarks --cycles "path/to/cycle/*.csv"                also time recorded cycles
+'''
+
+import numpy as np
+import pytest
+
+from .frames import load_cycles, synthetic, recorded
+
+
+def pytest_addoption(parser):
+  parser.addoption("--cycles", default = recorded, help = "glob of recorded CSV cycles to benchmark alongside synthetic ones")
+
+
+@pytest.fixture(scope = "session", params = ["synthetic", "recorded"])
+def frame(request) -> np.ndarray:
+  '''One 40x2200 cycle, synthetic or recorded.'''
+
+  if request.param == "synthetic":
+    return synthetic(1)[0]
+
+  cycles = load_cycles(request.config.getoption("--cycles"), limit = 1)
+  if not cycles:
+    pytest.skip("no recorded cycles found")
+  return cycles[0]
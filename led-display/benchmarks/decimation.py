@@ -0,0 +1,61 @@
+'''
+Accuracy against speed of the decimated pipeline, relative to full resolution.
+
+Run from `led-display` as `python -m benchmarks.decimation [pattern]`, where `pattern` globs recorded CSV cycles.
+Measured with the default settings and with an automatic offset, which adds a baseline stage working on every sample:
+with the defaults, decimating costs more than integrating fewer samples saves, so a speedup below 1 is expected there.
+'''
+
+import sys
+import timeit
+
+import numpy as np
+
+from data_handling.settings import Settings
+from data_handling.decimate import Decimator
+from data_handling.pipeline import Frame, Pipeline
+
+from .frames import frames, recorded
+
+
+def run(cycles, decimator = None, *, settings = None, repeat = 5):
+  '''Integrals of every cycle, and the best time per cycle, through the default pipeline with `settings`, or the default ones.'''
+
+  pipeline = Pipeline.default(settings or Settings(), decimator = decimator, classify = False)
+  process = lambda: [pipeline(Frame(each)).values.copy() for each in cycles]
+
+  values = np.array(process())
+  seconds = min(timeit.repeat(process, number = 1, repeat = repeat)) / len(cycles)
+  return values, seconds
+
+
+def main(pattern = recorded):
+  source, cycles = frames(pattern, count = 20)
+  print(f"{len(cycles)} {source} cycles of {cycles[0].shape[0]}x{cycles[0].shape[1]}")
+
+  for name, settings in (("default settings", Settings()), ("auto offset", Settings(auto_offset = 1))):
+    reference, base = run(cycles, settings = settings)
+
+    # thresholds at the 50th and 90th percentile of full-resolution integrals, to compare LED states
+    lower, upper = np.percentile(reference, [50, 90])
+    states = lambda values: (values > lower).astype(int) + (values > upper)
+    scale = np.abs(reference).max()
+
+    print(f"\n{name}")
+    print(f"{'method':>6} {'factor':>6} {'ms/cycle':>9} {'speedup':>8} {'max err':>9} {'rms err':>9} {'states':>7}")
+    print(f"{'-':>6} {1:>6} {base * 1e3:>9.3f} {1:>8.1f} {0:>9.2e} {0:>9.2e} {100:>6.1f}%")
+
+    for method in Decimator.methods:
+      for factor in (2, 5, 10, 20):
+        values, seconds = run(cycles, Decimator(factor, method = method), settings = settings)
+        error = (values - reference) / scale
+        agree = np.mean(states(values) == states(reference)) * 100
+
+        print(
+          f"{method:>6} {factor:>6} {seconds * 1e3:>9.3f} {base / seconds:>8.1f}"
+          f" {np.abs(error).max():>9.2e} {np.sqrt(np.mean(error ** 2)):>9.2e} {agree:>6.1f}%"
+        )
+
+
+if __name__ == "__main__":
+  main(*sys.argv[1:])
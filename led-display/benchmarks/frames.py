@@ -0,0 +1,58 @@
+'''
+Frames of BLM data for benchmarks: recorded cycles where available, synthetic ones otherwise.
+'''
+
+import glob
+
+import numpy as np
+
+from data_handling.topology import ring
+
+
+# where recorded cycles are kept, as in `graphic_interface/CSV-Reading.py`
+recorded = "BLM_R5IM_Data/cycle/*.csv"
+
+
+def load_cycles(pattern: str = recorded, *, channels = len(ring), limit: int = None) -> list[np.ndarray]:
+  '''Recorded cycles matching `pattern`, each as a channels by samples array.'''
+
+  out = []
+
+  for path in sorted(glob.glob(pattern))[:limit]:
+    # first column is the row index written by pandas
+    data = np.loadtxt(path, delimiter = ",", skiprows = 1)[:, 1:]
+    out.append(data.T if data.shape[1] == channels else data)
+
+  return out
+
+
+def synthetic(count: int = 10, *, channels = len(ring), points = ring.points, start = ring.start, end = ring.end, seed = 0) -> list[np.ndarray]:
+  '''Noisy cycles with a loss pulse and occasional spikes on each channel, shaped like the live data.'''
+
+  rng = np.random.default_rng(seed)
+  time = np.linspace(start, end, points)
+  out = []
+
+  for _ in range(count):
+    centre = rng.uniform(1, 9, (channels, 1))
+    width = rng.uniform(0.05, 0.5, (channels, 1))
+    height = rng.lognormal(-4, 1, (channels, 1))
+
+    data = rng.normal(rng.normal(0, 1e-3, (channels, 1)), 2e-3, (channels, points))
+    data -= height * np.exp(-((time - centre) / width) ** 2 / 2)
+
+    spikes = rng.random((channels, points)) < 1e-3
+    data[spikes] += rng.normal(0, 5e-2, spikes.sum())
+
+    out.append(data)
+
+  return out
+
+
+def frames(pattern: str = recorded, *, count = 10, **kwargs) -> tuple[str, list[np.ndarray]]:
+  '''Recorded cycles if any match `pattern`, otherwise synthetic ones, along with which were used.'''
+
+  cycles = load_cycles(pattern, limit = count) if pattern else []
+  if cycles:
+    return "recorded", cycles
+  return "synthetic", synthetic(count, **kwargs)
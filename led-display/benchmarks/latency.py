@@ -0,0 +1,58 @@
+'''
+End-to-end latency of the LED display, from a cycle's arrival to its LEDs being updated, with cycles replayed at the machine's rate.
+
+Run from `led-display` as `python -m benchmarks.latency [seconds] [rate]`, by default 10 s at 50 Hz.
+The window is rendered offscreen, and cycles are fed to the ingest as if they had come from the broker.
+LEDs are repainted at most `config.leds.rate` times a second, so latency is that of the cycles whose LEDs were repainted.
+'''
+
+import os
+import sys
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt5 import QtWidgets as qw
+
+import main as display
+
+from .frames import synthetic
+
+
+def main(seconds = 10, rate = 50):
+  seconds, rate = float(seconds), float(rate)
+
+  app = qw.QApplication.instance() or qw.QApplication([])
+  display.config.events.path = None
+  core = display.Core(None)
+  core.show()
+  core.ready.wait()
+  display.config.connected = True
+
+  source = core.source
+  payloads = [each.tobytes() for each in synthetic(50)]
+  start = time.monotonic()
+  behind = 0
+
+  def idle(until: float):
+    # the GUI thread's event loop, which LEDs are restyled on, runs while waiting as it would in the app
+    while time.monotonic() < until:
+      app.processEvents()
+      time.sleep(0.0002)
+
+  for i in range(int(seconds * rate)):
+    # hold to the machine's cadence, whether or not the display kept up
+    idle(start + i / rate)
+    core.ingest.receive(source, payloads[i % len(payloads)])
+    behind = max(behind, core.behind)
+
+  core.ingest.wait()
+  idle(time.monotonic() + 0.05)
+
+  print(f"{source.received} cycles at {rate:g} Hz, {source.dropped} dropped, at most {behind} behind")
+  core.profiler.dump()
+  core.ingest.close()
+
+
+if __name__ == "__main__":
+  main(*sys.argv[1:])
@@ -0,0 +1,61 @@
+'''
+Error and speed of float32 processing, against the float64 path.
+
+Run from `led-display` as `python -m benchmarks.precision [pattern]`, where `pattern` globs recorded CSV cycles.
+Each integral's error is checked against the bound documented on `Frame`.
+Times include decoding each cycle into a buffer of the precision, as `Source` does, so the float32 path pays for its conversion.
+'''
+
+import sys
+import timeit
+
+import numpy as np
+
+from data_handling.settings import Settings
+from data_handling.pipeline import Frame, Pipeline
+
+from .frames import frames, recorded
+
+
+def run(cycles, dtype, *, repeat = 5, **settings):
+  '''Integrals of every cycle, and the best time per cycle, through the default pipeline in `dtype`.'''
+
+  pipeline = Pipeline.default(Settings(**settings), classify = False)
+  buffer = np.empty(cycles[0].shape, dtype = dtype)
+
+  def process():
+    out = []
+    for each in cycles:
+      np.copyto(buffer, each, casting = "same_kind")
+      out.append(pipeline(Frame(buffer)).values.copy())
+    return out
+
+  values = np.array(process())
+  seconds = min(timeit.repeat(process, number = 1, repeat = repeat)) / len(cycles)
+  return values, seconds
+
+
+def main(pattern = recorded):
+  source, cycles = frames(pattern, count = 20)
+  print(f"{len(cycles)} {source} cycles of {cycles[0].shape[0]}x{cycles[0].shape[1]}")
+
+  for name, settings in [("raw", {}), ("filtered", {"invert": True, "scale": 2, "auto_offset": 1})]:
+    reference, base = run(cycles, np.float64, **settings)
+    values, seconds = run(cycles, np.float32, **settings)
+
+    dx = 11 / (cycles[0].shape[1] - 1)
+    bound = 3 * 2.0 ** -24 * dx * np.array([np.abs(each).sum(axis = 1) for each in cycles]) * settings.get("scale", 1)
+    error = np.abs(values - reference)
+
+    lower, upper = np.percentile(reference, [50, 90])
+    states = lambda values: (values > lower).astype(int) + (values > upper)
+
+    print(f"{name}:")
+    print(f"  ms/cycle       float64 {base * 1e3:.3f}, float32 {seconds * 1e3:.3f} ({base / seconds:.2f}x)")
+    print(f"  abs error      max {error.max():.3e}, worst fraction of bound {(error / bound).max():.3f}")
+    print(f"  rel error      max {(error / np.abs(reference).max()).max():.3e} of full scale")
+    print(f"  LED states     {np.mean(states(values) == states(reference)) * 100:.2f}% agree")
+
+
+if __name__ == "__main__":
+  main(*sys.argv[1:])
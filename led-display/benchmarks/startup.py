@@ -0,0 +1,74 @@
+'''
+Startup cost of the LED display: time to first paint of the window, and the heaviest imports before it.
+
+Run from `led-display` as `python -m benchmarks.startup [runs]`.
+The window is rendered offscreen, in a fresh interpreter run with `-X importtime`.
+'''
+
+import os
+import re
+import sys
+import subprocess
+
+
+# times are measured from the start of the script, so include every import made by `main`
+script = """
+import time
+start = time.perf_counter()
+
+from PyQt5 import QtWidgets as qw
+
+import main
+
+app = qw.QApplication([])
+main.config.events.path = None
+core = main.Core(None)
+core.show()
+app.processEvents()
+print(f"first paint {time.perf_counter() - start:.6f}")
+
+core.ready.wait()
+print(f"pipelines ready {time.perf_counter() - start:.6f}")
+"""
+
+watched = ("numpy", "scipy", "pandas", "matplotlib", "PyQt5", "paho", "data_handling")
+
+
+def run() -> tuple[dict[str, float], dict[str, float]]:
+  '''Milestones, and cumulative import times of the watched packages, in seconds.'''
+
+  environment = {**os.environ, "QT_QPA_PLATFORM": "offscreen"}
+  result = subprocess.run(
+    [sys.executable, "-X", "importtime", "-c", script],
+    capture_output = True, text = True, env = environment, check = True,
+  )
+
+  milestones = {
+    name: float(value)
+    for name, value in re.findall(r"^(.+?) ([\d.]+)$", result.stdout, re.MULTILINE)
+  }
+
+  imports = {}
+  for line in result.stderr.splitlines():
+    match = re.match(r"import time:\s+\d+ \|\s+(\d+) \|\s*(\S+)", line)
+    if match and match.group(2) in watched:
+      imports[match.group(2)] = int(match.group(1)) / 1e6
+
+  return milestones, imports
+
+
+def main(runs = 5):
+  results = [run() for _ in range(int(runs))]
+
+  print(f"best of {len(results)} runs, offscreen")
+  for name in results[0][0]:
+    print(f"  {name:<20} {min(each[0][name] for each in results) * 1e3:>8.1f} ms")
+
+  print("cumulative import time")
+  for name in watched:
+    times = [each[1][name] for each in results if name in each[1]]
+    print(f"  {name:<20} {min(times) * 1e3:>8.1f} ms" if times else f"  {name:<20} {'not imported':>11}")
+
+
+if __name__ == "__main__":
+  main(*sys.argv[1:])
@@ -0,0 +1,64 @@
+import numpy as np
+
+from .classify import classify
+
+
+class Alarms:
+  '''Alarm level of every channel, with hysteresis and N-of-M debounce, so LEDs don't flicker while a value sits near a threshold.
+
+  A channel's level rises once its value has exceeded a higher threshold in `count` of the last `window` cycles,
+  and falls once it has been below a lower level's clear threshold, which sits below the raise threshold, in as many.
+  Every update is a handful of vectorised operations on int8 arrays, whatever the number of channels.
+  '''
+
+  def __init__(self, channels: int, *, count = 3, window = 5, hysteresis = 0.1):
+    '''`count`, `window`: cycles out of the most recent that must agree before a level changes.
+    `hysteresis`: how far below each raise threshold its clear threshold is, as a fraction of the gap between the thresholds.
+    '''
+
+    if not 0 < count <= window:
+      raise ValueError("Debounce count must be in (0, window]")
+
+    self.count = count
+    self.window = window
+    self.hysteresis = hysteresis
+
+    self.level = np.zeros(channels, dtype = np.int8)
+    self.raised = np.zeros((window, channels), dtype = np.int8)
+    self.cleared = np.zeros((window, channels), dtype = np.int8)
+    self.position = 0
+
+  def update(self, raised: np.array, cleared: np.array) -> np.ndarray:
+    '''Takes this cycle's categories against the raise and the clear thresholds, and returns the indices of channels whose level changed.'''
+
+    self.raised[self.position] = raised
+    self.cleared[self.position] = cleared
+    self.position = (self.position + 1) % self.window
+
+    # highest level reached, and lowest level fallen to, in at least `count` of the window
+    up = np.partition(self.raised, self.window - self.count, axis = 0)[self.window - self.count]
+    down = np.partition(self.cleared, self.count - 1, axis = 0)[self.count - 1]
+
+    # with `count` at most half the window, a channel can both reach and fall below its level in enough cycles;
+    # it's only cleared once it no longer reaches it, so a steady input holds a steady level
+    level = np.where(up >= self.level, np.maximum(up, self.level), np.minimum(self.level, down))
+    changed = np.flatnonzero(level != self.level)
+    self.level = level
+    return changed
+
+  def judge(self, values: np.array, lower: np.array, upper: np.array) -> np.ndarray:
+    '''Updates from each channel's value and its `lower` and `upper` thresholds, returning the indices of channels whose level changed.
+
+    NaN values, such as those of channels filtered out, count as below every threshold.
+    '''
+
+    band = self.hysteresis * np.abs(upper - lower)
+    raised = classify(values, (lower, upper))
+    cleared = classify(values, (lower - band, upper - band))
+    return self.update(raised, cleared)
+
+  def reset(self) -> None:
+    self.level[:] = 0
+    self.raised[:] = 0
+    self.cleared[:] = 0
+    self.position = 0
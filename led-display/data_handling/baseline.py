@@ -0,0 +1,89 @@
+import numpy as np
+
+from .topology import ring
+
+
+class Baseline:
+  '''Estimates the zero-level of every channel at once from its pre-injection samples.
+  '''
+
+  methods = ("mean", "median", "trimmed")
+
+
+  def __init__(self, *, method = "mean", trim = 0.1, alpha = None, start = ring.start, end = ring.end, window: slice = None):
+    '''Creates a baseline estimator.
+
+    `method`: one of `"mean"`, `"median"` or `"trimmed"` (a mean ignoring the `trim` fraction of lowest and highest samples).
+    `alpha`: weight of the newest cycle when tracking the baseline across cycles with an exponential moving average, or `None` to estimate each cycle afresh.
+    `start`, `end`: the time span of a frame, used to find the pre-injection (t < 0) samples when no time grid is given.
+    `window`: the samples to estimate from, instead of the pre-injection ones.
+    '''
+
+    if method not in Baseline.methods:
+      raise ValueError(f"Unknown baseline method {method!r}")
+    if not 0 <= trim < 0.5:
+      raise ValueError("Trim fraction must be in [0, 0.5)")
+    if alpha is not None and not 0 < alpha <= 1:
+      raise ValueError("Smoothing factor must be in (0, 1]")
+
+    self.start = start
+    self.end = end
+    self.method = method
+    self.trim = trim
+    self.alpha = alpha
+    self.window = window
+    self.state = None
+
+  def _window_(self, points: int, time: np.array = None) -> slice:
+    '''A minor inner method to find the samples to estimate from in a frame of `points` samples.'''
+
+    if self.window is not None:
+      return self.window
+    if time is None:
+      time = np.linspace(self.start, self.end, points)
+    return slice(0, int(np.searchsorted(time, 0)))
+
+  def estimate(self, data: np.array, time: np.array = None) -> np.array:
+    '''Baseline of each channel of `data`, sampled at `time`, in this cycle alone.'''
+
+    data = np.asarray(data)
+    samples = data[:, self._window_(data.shape[1], time)]
+    if samples.shape[1] == 0:
+      return np.zeros(len(samples))
+
+    match self.method:
+      case "mean":
+        return samples.mean(axis = 1)
+      case "median":
+        return np.median(samples, axis = 1)
+      case "trimmed":
+        cut = int(self.trim * samples.shape[1])
+        return np.sort(samples, axis = 1)[:, cut:samples.shape[1] - cut].mean(axis = 1)
+
+  def update(self, data: np.array, time: np.array = None, channels: np.array = None) -> np.array:
+    '''Baseline of each channel of `data`, tracked across cycles if a smoothing factor is set.
+
+    `channels`: the channel of each row of `data`, by default `0` onwards, so each keeps its own baseline whichever are passed in a cycle.
+    '''
+
+    current = self.estimate(data, time)
+    if self.alpha is None:
+      return current
+
+    channels = np.arange(len(current)) if channels is None else np.asarray(channels)
+    if self.state is None or len(self.state) <= channels.max(initial = -1):
+      # one row per channel, NaN until a channel is first seen
+      state = np.full(channels.max(initial = -1) + 1, np.nan)
+      if self.state is not None:
+        state[:len(self.state)] = self.state
+      self.state = state
+
+    previous = self.state[channels]
+    level = np.where(np.isnan(previous), current, previous + self.alpha * (current - previous))
+    self.state[channels] = level
+    return level
+
+  def reset(self) -> None:
+    '''Forgets the baseline tracked across cycles.'''
+
+    self.state = None
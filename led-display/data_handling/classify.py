@@ -0,0 +1,30 @@
+import numpy as np
+
+
+def classify(values: np.array, thresholds: np.array, *, out: np.array = None) -> np.ndarray:
+  '''Category of each channel's value: how many of its ascending thresholds it exceeds, as int8.
+
+  `thresholds`: levels by channels, or a single list of levels shared by every channel, in ascending order either way.
+  Two levels give the LED states `0` (norm), `1` (concern) and `2` (doom); any number of levels can be used.
+  `out`: a preallocated int8 array to write the categories into.
+
+  Nothing is kept between calls, and a NaN value exceeds no threshold, so it falls in category `0`.
+  '''
+
+  values = np.asarray(values, dtype = float)
+  thresholds = np.asarray(thresholds, dtype = float)
+
+  if out is None:
+    out = np.empty(values.shape, dtype = np.int8)
+
+  if thresholds.ndim == 1:
+    # shared levels: a binary search of them per value, where `right` counts only levels strictly below
+    out[...] = np.digitize(values, thresholds, right = True)
+    out[np.isnan(values)] = 0
+  else:
+    # per-channel levels: one comparison per level, summed in place
+    np.greater(values, thresholds[0], out = out, casting = "unsafe")
+    for level in thresholds[1:]:
+      out += values > level
+
+  return out
@@ -1,40 +1,36 @@
-from copy import deepcopy
-
 import numpy as np
 
+from .settings import Settings
+from .baseline import Baseline
+
 
 class DataFilter:
   '''A object with configurable settings to filter input data.
   '''
 
-  labels = ["r0blm1", "r0blm3", "r0blm4",
-            "r1blm1", "r1blm2", "r1blm3", "r1blm4",
-            "r2blm1", "r2blm2", "r2blm3", "r2blm4",
-            "r3blm1", "r3blm2", "r3blm3", "r3blm4",
-            "r4blm1", "r4blm2", "r4blm3", "r4blm4",
-            "r5blm1", "r5blm2", "r5blm3", "r5blm4",
-            "r6blm1", "r6blm2", "r6blm3", "r6blm4",
-            "r7blm1", "r7blm2", "r7blm3", "r7blm4",
-            "r8blm1", "r8blm2", "r8blm3", "r8blm4",
-            "r9blm1", "r9blm2", "r9blm3", "r9blm4",
-            "r5im"]
+  # filter setting names that are stored under a different name in `Settings`
+  aliases = {"select": "active"}
+
+  fields = ("active", "invert", "scale", "offset", "auto_offset")
   
   
-  def __init__(self, *, select = True, invert = False, scale = 1, offset = 0, auto_offset = 0):
+  def __init__(self, *, select = True, invert = False, scale = 1, offset = 0, auto_offset = 0, settings: Settings = None, baseline: Baseline = None):
     '''Creates a filterer object, with configurable settings to filter input data.
+
+    `settings`: a shared settings store to read the filter settings from, instead of creating one from the other arguments.
+    `baseline`: the estimator used to zero channels with `auto_offset` enabled, by default the mean of the pre-injection samples.
     '''
 
     self.data = []
+    self.baseline = Baseline() if baseline is None else baseline
 
-    template = {
-      "select": select,
-      "invert": invert,
-      "scale": scale,
-      "offset": offset,
-      "auto_offset": auto_offset,
-    }
+    if settings is None:
+      settings = Settings(active = select, invert = invert, scale = scale, offset = offset, auto_offset = auto_offset)
 
-    self.settings = [deepcopy(template) for i in range(40)]
+    self.settings = settings
+    self.labels = settings.labels
+    self.settings.subscribe(self._changed_)
+    self._compile_()
 
   def _index_(self, label) -> int:
     '''A minor inner method to convert the string name of a BLM to its corresponding index.'''
@@ -42,7 +38,7 @@ class DataFilter:
     if isinstance(label, int):
       return label
     elif isinstance(label, str):
-      return DataFilter.labels.index(label)
+      return self.settings.topology.index(label)
     else:
       raise TypeError
 
@@ -70,7 +66,7 @@ class DataFilter:
       out = data - auto_offset
 
     if offset != 0:
-      out = data + offset
+      out = out + offset
     
     return out
 
@@ -80,59 +76,47 @@ class DataFilter:
 
     `setting`: the filter setting to configure.
     `state`: the value to set the setting to.
-    `labels`: the BLMs to apply the setting to.
+    `labels`: the BLMs to apply the setting to, or all of them if none are specified.
     '''
 
-    # if none specified, set for all
-    if labels is None:
-      for each in self.settings:
-        each[setting] = state
-    
-    else:
-      # single specified
-      if isinstance(labels, str) or isinstance(labels, int):
-        self.settings[self._index_(labels)][setting] = state
-
-      # multiple specified
-      else:
-        for each in labels:
-          self.settings[self._index_(each)][setting] = state
+    self.settings.set(DataFilter.aliases.get(setting, setting), state, labels)
 
   
   def reset(self) -> None:
     '''Resets filters to their default settings.'''
 
-    self.settings = [{
-      "select": True,
-      "invert": False,
-      "scale": 1,
-      "offset": 0,
-      "auto_offset": 0
-    }] * 40
+    self.settings.reset(DataFilter.fields)
 
-  
-  def apply(self, data: np.array) -> np.array:
-    '''Filters `data` according to the configured settings.'''
-    
-    self.data = data
-  
-    for i, each in enumerate(self.settings):
-      # skip if not selected
-      if not each["select"]:
-        continue
+  def _changed_(self, setting: str, indices: np.ndarray) -> None:
+    '''Recompiles the filter kernel when one of its settings changes.'''
 
-      self.data[i] = data[i]
+    if setting is None or setting in DataFilter.fields:
+      self._compile_()
 
-      if each["invert"]:
-        self.data[i] = self.invert(self.data[i])
+  def _compile_(self) -> None:
+    '''A minor inner method to precompute the per-channel arrays `apply` works from.'''
 
-      if each["scale"] != 1:
-        self.data[i] = self.scale(self.data[i], each["scale"])
+    values = self.settings.values
+    self.kernel = {
+      "index": np.flatnonzero(values["active"]),
+      "gain": np.where(values["invert"], -1.0, 1.0) * values["scale"],
+      "offset": values["offset"].copy(),
+      "auto_offset": values["auto_offset"].copy(),
+    }
+
+  
+  def apply(self, data: np.array) -> np.array:
+    '''Filters `data` according to the configured settings, returning only the selected channels.'''
+    
+    kernel = self.kernel
+    index = kernel["index"]
 
-      if each["offset"] != 0:
-        self.data[i] = self.offset(self.data[i], offset = each["offset"])
+    self.data = data[index] * kernel["gain"][index, None]
+    self.data += kernel["offset"][index, None]
 
-      if each["auto_offset"] != 0:
-        self.data[i] = self.offset(self.data[i], points = each["auto_offset"])
+    # zero every auto-offset channel against its baseline in one pass
+    rows = np.flatnonzero(kernel["auto_offset"][index])
+    if len(rows):
+      self.data[rows] -= self.baseline.update(self.data[rows], channels = index[rows])[:, None]
 
-    return [each for i, each in enumerate(self.data) if self.settings[i]["select"]]
+    return self.data
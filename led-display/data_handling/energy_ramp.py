@@ -1,9 +1,9 @@
 import numpy as np
 
-from scipy.constants import c, m_p, e
-
 
 def synchrotron_momentum(emax, time):
+  from scipy.constants import c, m_p, e
+
   mpeV = m_p * c**2 / e           # Proton mass in eV
   R0 = 26                         # Mean machine radius
   n_dip = 10                      # Number of dipoles
@@ -25,6 +25,8 @@ def synchrotron_momentum(emax, time):
   return pdip(time*1E-3)
 
 def synchrotron_kinetic_energy(emax, time, unit = "eV"):
+  from scipy.constants import c, m_p, e
+
   mpeV = m_p * c**2 / e           # Proton mass in eV    
   # Relativistic Kinetic Energy = Relativistic Energy - mass
   return (
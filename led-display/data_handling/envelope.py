@@ -0,0 +1,54 @@
+import numpy as np
+
+
+class Envelope:
+  '''Minimum and maximum of traces over each pixel column they're drawn across, so a trace is drawn with two points a column
+  yet still shows every spike exactly.
+
+  Samples are split over columns as evenly as they go, and each column reduced with `reduceat`, as a column spans a fractional number of samples.
+  Envelopes are cached by their trace's key, such as its channel and cycle, and width, so repainting without a new cycle reduces nothing.
+  '''
+
+  def __init__(self, points: int, *, size = 64):
+    '''`points`: samples in each trace.
+    `size`: most envelopes cached, the oldest dropped first.
+    '''
+
+    self.points = points
+    self.size = size
+    self.starts = {}
+    self.cache = {}
+
+  def reduces(self, width: int) -> bool:
+    '''Whether drawing an envelope `width` columns wide takes fewer points than the trace itself.'''
+
+    return 0 < 2 * width < self.points
+
+  def reduce(self, traces: np.array, width: int) -> np.ndarray:
+    '''Envelopes of each row of `traces` across `width` columns, as rows of each column's minimum then maximum, in column order.'''
+
+    if width not in self.starts:
+      self.starts[width] = np.arange(width) * self.points // width
+
+    traces = np.atleast_2d(traces)
+    out = np.empty((len(traces), width, 2), dtype = traces.dtype)
+    np.minimum.reduceat(traces, self.starts[width], axis = 1, out = out[..., 0])
+    np.maximum.reduceat(traces, self.starts[width], axis = 1, out = out[..., 1])
+    return out.reshape(len(traces), 2 * width)
+
+  def get(self, traces: np.array, width: int, keys: list) -> list[np.ndarray]:
+    '''Envelopes of each row of `traces` across `width` columns, reducing only those of `keys` not already cached at this width.'''
+
+    missing = [i for i, key in enumerate(keys) if (key, width) not in self.cache]
+    if missing:
+      for i, envelope in zip(missing, self.reduce(np.asarray(traces)[missing], width)):
+        self.cache[(keys[i], width)] = envelope
+
+      # dicts keep insertion order, so the first keys are the oldest
+      for key in list(self.cache)[:max(len(self.cache) - self.size, 0)]:
+        del self.cache[key]
+
+    return [self.cache[(key, width)] for key in keys]
+
+  def clear(self) -> None:
+    self.cache.clear()
@@ -0,0 +1,217 @@
+import os
+import csv
+import queue
+import time
+import threading
+import traceback
+
+import numpy as np
+
+from .topology import Topology, ring
+from .settings import Settings
+
+
+class EventLog:
+  '''Append-only log of alarm level changes, indexed in memory by channel and time, and optionally kept in a CSV file.
+
+  Changes are recorded in batches by the processing thread and appended by a background writer, so an alarm storm costs a cycle only a queue put.
+  Events are appended in time order, so a query is a binary search of all events' times, then of its channel's rows, taking microseconds at any size.
+  An existing file is read back by the writer too, so a long history doesn't delay startup; rows it can't parse,
+  such as one cut short by a crash, are skipped and counted in `skipped`.
+  Nothing read or written stops the writer: a file that can't be read or opened is reported and the log kept in memory,
+  and batches that can't be written, such as on a full disk, are reported, kept in memory and counted in `failed`.
+  '''
+
+  fields = np.dtype([
+    ("time", np.float64), # seconds since the epoch
+    ("channel", np.int32),
+    ("before", np.int8),
+    ("after", np.int8),
+    ("value", np.float64),
+    ("unit", np.int8), # index into `Settings.units`
+  ])
+
+  states = ("norm", "concern", "doom")
+
+
+  def __init__(self, topology: Topology = ring, path: str = None, *, history: float = None, capacity = 1024):
+    '''`path`: CSV file the events are appended to, and read back from when the log is created, or `None` to keep them in memory only.
+    `history`: seconds of past events read back, or `None` for all of them.
+    `capacity`: events held before the first time the buffers grow.
+    '''
+
+    self.topology = topology
+    self.path = path
+    self.history = history
+    self.skipped = 0
+    self.failed = 0
+
+    self.events = np.empty(capacity, dtype = EventLog.fields)
+    self.count = 0
+    # rows of each channel's events, in time order
+    self.rows = [np.empty(16, dtype = np.intp) for _ in topology.labels]
+    self.counts = np.zeros(len(topology), dtype = np.intp)
+
+    self.lock = threading.Lock()
+    self.queue = queue.Queue()
+    # set once the file's events have been read back
+    self.loaded = threading.Event()
+
+    self.writer = threading.Thread(target = self._write_, name = "event-log", daemon = True)
+    self.writer.start()
+
+  def __len__(self) -> int:
+    return self.count
+
+  def record(self, time: float, channels: np.array, before: np.array, after: np.array, values: np.array, units: np.array) -> None:
+    '''Queues the changes of `channels` from level `before` to `after` at `time`, with their `values` in their `units`, for the writer to append.'''
+
+    batch = np.empty(len(channels), dtype = EventLog.fields)
+    batch["time"] = time
+    batch["channel"] = channels
+    batch["before"] = before
+    batch["after"] = after
+    batch["value"] = values
+    batch["unit"] = units
+    self.queue.put(batch)
+
+  def query(self, channel: str | int = None, *, state: str | int = None, since: float = None, until: float = None) -> np.ndarray:
+    '''Events as a structured array of `fields` in time order: those of `channel` if given, changing to `state` if given,
+    from `since` up to but not including `until` if given.
+
+    Events still queued for the writer, or still being read back from the file, aren't included; call `flush` first to wait for them.
+    '''
+
+    with self.lock:
+      times = self.events["time"][:self.count]
+      start = 0 if since is None else np.searchsorted(times, since, side = "left")
+      stop = self.count if until is None else np.searchsorted(times, until, side = "left")
+
+      if channel is None:
+        events = self.events[start:stop].copy()
+      else:
+        channel = self.topology.index(channel)
+        rows = self.rows[channel][:self.counts[channel]]
+        events = self.events[rows[np.searchsorted(rows, start):np.searchsorted(rows, stop)]]
+
+    if state is not None:
+      state = EventLog.states.index(state) if isinstance(state, str) else state
+      events = events[events["after"] == state]
+
+    return events
+
+  def flush(self) -> None:
+    '''Waits until the file has been read back and every recorded event appended.'''
+
+    self.loaded.wait()
+    self.queue.join()
+
+  def close(self) -> None:
+    '''Appends any queued events, then stops the writer.'''
+
+    if self.writer.is_alive():
+      self.queue.put(None)
+      self.writer.join()
+
+  def _append_(self, batch: np.ndarray) -> None:
+    '''A minor inner method to add events to the buffers and the index, growing them as needed.'''
+
+    # kept in order should the wall clock step back
+    if self.count:
+      np.maximum(batch["time"], self.events["time"][self.count - 1], out = batch["time"])
+
+    with self.lock:
+      if self.count + len(batch) > len(self.events):
+        self.events = np.resize(self.events, max(2 * len(self.events), self.count + len(batch)))
+      self.events[self.count:self.count + len(batch)] = batch
+
+      for row, channel in enumerate(batch["channel"].tolist(), self.count):
+        if self.counts[channel] == len(self.rows[channel]):
+          self.rows[channel] = np.resize(self.rows[channel], 2 * len(self.rows[channel]))
+        self.rows[channel][self.counts[channel]] = row
+        self.counts[channel] += 1
+
+      self.count += len(batch)
+
+  def _write_(self) -> None:
+    '''A minor inner method to append queued events, to the buffers and to the file, until closed.'''
+
+    file = None
+    try:
+      if self.path is not None:
+        new = not os.path.exists(self.path) or not os.path.getsize(self.path)
+        ended = new or self._read_(self.path)
+        file = open(self.path, "a", newline = "", encoding = "utf-8")
+        writer = csv.writer(file)
+        if new:
+          writer.writerow(EventLog.fields.names)
+        elif not ended:
+          # finish a row cut short, so the next starts on its own line
+          file.write("\r\n")
+        file.flush()
+    except Exception:
+      # events are still logged in memory
+      traceback.print_exc()
+    finally:
+      self.loaded.set()
+
+    try:
+      while (batch := self.queue.get()) is not None:
+        try:
+          self._append_(batch)
+
+          if file is not None:
+            writer.writerows(
+              (repr(time), self.topology.labels[channel], EventLog.states[before], EventLog.states[after], repr(value), Settings.units[unit])
+              for time, channel, before, after, value, unit in batch.tolist()
+            )
+            file.flush()
+        except Exception:
+          # the batch is still logged in memory if it got that far, and the next is written as usual
+          self.failed += 1
+          traceback.print_exc()
+        finally:
+          self.queue.task_done()
+    finally:
+      self.queue.task_done()
+      if file is not None:
+        try:
+          file.close()
+        except OSError:
+          traceback.print_exc()
+
+  def _read_(self, path: str) -> bool:
+    '''A minor inner method to load the events of an existing file within `history`, skipping and counting rows that can't be parsed
+    or are of channels not in the topology. Returns whether the file ends with a complete line.
+
+    Undecodable bytes are replaced, so only their rows are skipped; if the file can't be read on, the events read so far are kept.
+    '''
+
+    labels = {label: i for i, label in enumerate(self.topology.labels)}
+    since = -np.inf if self.history is None else time.time() - self.history
+    rows = []
+    ended = True
+
+    try:
+      with open(path, newline = "", encoding = "utf-8", errors = "replace") as file:
+        for row in csv.reader(file):
+          if row == list(EventLog.fields.names):
+            continue
+          try:
+            when, label, before, after, value, unit = row
+            event = (float(when), labels[label], EventLog.states.index(before), EventLog.states.index(after), float(value), Settings.units.index(unit))
+          except (ValueError, KeyError):
+            self.skipped += 1
+            continue
+          if event[0] >= since:
+            rows.append(event)
+
+      with open(path, "rb") as file:
+        file.seek(-1, os.SEEK_END)
+        ended = file.read(1) == b"\n"
+    except (OSError, csv.Error):
+      traceback.print_exc()
+
+    if rows:
+      self._append_(np.sort(np.array(rows, dtype = EventLog.fields), order = "time", kind = "stable"))
+    return ended
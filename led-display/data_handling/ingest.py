@@ -0,0 +1,433 @@
+import time
+import random
+import asyncio
+import threading
+import traceback
+from collections import deque
+from functools import partial
+
+import numpy as np
+import paho.mqtt.client as mqtt
+
+from .settings import Settings
+from .profiling import Profiler
+from .topology import Topology, ring
+from .validate import Validator
+
+
+class Source:
+  '''One stream of BLM cycles: an MQTT topic on a broker, with the installation it comes from.
+
+  Cycles are decoded into a small pool of preallocated buffers, so arriving data never allocates.
+  When every buffer is waiting to be processed the oldest cycle is dropped for the newest.
+  Each cycle is numbered in order of arrival, so gaps in the numbers processed show cycles dropped, and `sequence` less a cycle's number how far behind it is.
+  '''
+
+  def __init__(self, name: str, topic: str, *,
+    host = "localhost",
+    port = 1883,
+    topology: Topology = ring,
+    settings: Settings = None,
+    results: str = None,
+    validator: Validator = None,
+    pool = 4,
+    dtype = np.float64,
+  ):
+    '''`settings`: the settings of the source's channels, by default a fresh store for `topology`.
+    `results`: a topic to publish each cycle's integrals to, as float64 with NaN for channels filtered out.
+    `validator`: checks each payload before it takes a buffer, by default only for its size and finite samples.
+    `pool`: buffers to decode cycles into, at least two so one can be processed while the next arrives.
+    `dtype`: precision of the buffers, which payloads are converted to as they're copied in, so no stage has to convert them again.
+    '''
+
+    if pool < 2:
+      raise ValueError("A source needs at least two buffers")
+
+    self.name = name
+    self.topic = topic
+    self.host = host
+    self.port = port
+    self.topology = topology
+    self.settings = Settings(topology) if settings is None else settings
+    self.results = results
+    self.validator = Validator(topology) if validator is None else validator
+
+    self.free = deque(np.empty(topology.shape, dtype = dtype) for _ in range(pool))
+    self.pending = deque()
+    self.pipelines = []
+
+    # integrals of every channel from the last processed cycle, NaN where a channel was filtered out
+    self.values = np.full(len(topology), np.nan)
+
+    self.received = 0
+    self.dropped = 0
+    # cycles whose processing raised
+    self.failed = 0
+
+    # number of the last cycle to arrive
+    self.sequence = 0
+
+  @property
+  def broker(self) -> tuple[str, int]:
+    return self.host, self.port
+
+  def decode(self, payload: bytes, arrival: float = None) -> tuple[np.ndarray, int, float] | None:
+    '''Copies a cycle from an MQTT `payload` into a free buffer, dropping the oldest pending cycle if there is none.
+
+    `arrival`: when the payload arrived on the `time.monotonic` clock, by default now.
+
+    Returns the buffer, the cycle's number and its arrival as queued for processing,
+    or `None` without taking a buffer if the payload fails validation.
+    Not thread-safe on its own; `Ingest` calls it under its lock.
+    '''
+
+    arrival = time.monotonic() if arrival is None else arrival
+    data = self.validator.check(payload, arrival)
+    if data is None:
+      return None
+
+    if self.free:
+      buffer = self.free.popleft()
+    else:
+      buffer, _, _ = self.pending.popleft()
+      self.dropped += 1
+
+    np.copyto(buffer, data, casting = "same_kind")
+    self.sequence += 1
+    self.received += 1
+
+    cycle = buffer, self.sequence, arrival
+    self.pending.append(cycle)
+    return cycle
+
+
+class Ingest:
+  '''Subscribes to every source, with one MQTT client per broker, and passes their cycles to a pool of analysis workers.
+
+  Workers take sources in turn, one cycle at a time, so a busy source can't starve the others.
+  Each source is only ever processed by one worker at a time, so its pipeline's state across cycles stays consistent.
+  '''
+
+  def __init__(self, sources: list[Source], handle, *,
+    workers = 1,
+    backoff: tuple[float, float] = (0.5, 30),
+    on_connect = None,
+    on_disconnect = None,
+    profiler: Profiler = None,
+  ):
+    '''`handle`: called as `handle(source, data, sequence, arrival)` on a worker thread with each cycle, whose data is only valid until it returns.
+    `backoff`: shortest and longest wait in seconds before reconnecting to a broker, doubling after each failed attempt.
+    `on_connect`, `on_disconnect`: called with the `(host, port)` of a broker as its connection comes up, and with the paho reason code as it goes down.
+    `profiler`: records the time taken to decode each cycle, if given.
+    '''
+
+    self.sources = list(sources)
+    self.handle = handle
+    self.backoff = backoff
+    self.on_connect = on_connect
+    self.on_disconnect = on_disconnect
+    self.profiler = profiler
+
+    self.condition = threading.Condition()
+    self.busy = set()
+    self.turn = 0
+    self.stopped = False
+
+    self.routes = {(each.broker, each.topic): each for each in self.sources}
+    self.clients = {}
+    # return code of the last CONNACK from each broker, 0 if it accepted the connection
+    self.answers = {}
+
+    for broker in dict.fromkeys(each.broker for each in self.sources):
+      client = mqtt.Client(userdata = broker)
+      client.on_connect = self._connected_
+      client.on_message = self._message_
+      client.on_disconnect = self._disconnected_
+      client.reconnect_delay_set(*(max(1, round(each)) for each in backoff))
+      self.clients[broker] = client
+
+    self.workers = [
+      threading.Thread(target = self._work_, name = f"ingest-{i}", daemon = True)
+      for i in range(workers)
+    ]
+    for each in self.workers:
+      each.start()
+
+  ## MQTT callbacks
+  def _connected_(self, client, broker, flags, rc):
+    '''A minor inner method to subscribe to every topic on a broker once it accepts the connection.'''
+
+    self.answers[broker] = rc
+    # a broker refusing the connection closes it straight after, and paho keeps backing off until one is accepted
+    if rc != mqtt.CONNACK_ACCEPTED:
+      return
+
+    client.subscribe([(each.topic, 0) for each in self.sources if each.broker == broker])
+    if self.on_connect is not None:
+      self.on_connect(broker)
+
+  def _disconnected_(self, client, broker, rc):
+    if self.on_disconnect is not None:
+      self.on_disconnect(broker, rc)
+
+  def _message_(self, client, broker, msg):
+    source = self.routes.get((broker, msg.topic))
+    if source is not None:
+      self.receive(source, msg.payload, msg.timestamp)
+
+  ## scheduling
+  def receive(self, source: Source, payload: bytes, arrival: float = None) -> None:
+    '''Queues a cycle of `source` for the workers, unless it fails validation.
+
+    `arrival`: when the payload arrived on the `time.monotonic` clock, by default now.
+    '''
+
+    with self.condition:
+      if self.profiler is None:
+        data = source.decode(payload, arrival)
+      else:
+        with self.profiler.time("decode"):
+          data = source.decode(payload, arrival)
+
+      if data is not None:
+        self.condition.notify()
+
+  def _next_(self) -> tuple[Source, tuple[np.ndarray, int, float]] | None:
+    '''A minor inner method to wait for the next source in turn with a cycle pending and no worker on it.'''
+
+    with self.condition:
+      while not self.stopped:
+        for k in range(len(self.sources)):
+          source = self.sources[(self.turn + k) % len(self.sources)]
+          if source.pending and source not in self.busy:
+            self.turn = (self.turn + k + 1) % len(self.sources)
+            self.busy.add(source)
+            return source, source.pending.popleft()
+
+        self.condition.wait()
+
+  def _work_(self):
+    while (job := self._next_()) is not None:
+      source, (data, sequence, arrival) = job
+      try:
+        self.handle(source, data, sequence, arrival)
+      except Exception:
+        # one bad cycle mustn't stop the worker, which would leave every later cycle pending
+        source.failed += 1
+        traceback.print_exc()
+      finally:
+        with self.condition:
+          source.free.append(data)
+          self.busy.discard(source)
+          self.condition.notify_all()
+        self._released_(source)
+
+  def _released_(self, source: Source) -> None:
+    '''A minor inner method called once a worker has handed back a buffer of `source`.'''
+
+  def wait(self, timeout: float = None) -> bool:
+    '''Blocks until every queued cycle has been processed, returning False if `timeout` seconds passed first.'''
+
+    with self.condition:
+      return self.condition.wait_for(lambda: not self.busy and not any(each.pending for each in self.sources), timeout)
+
+  def publish(self, source: Source, payload: bytes) -> None:
+    '''Publishes `payload` to the results topic of `source` on its broker, if it has one.'''
+
+    if source.results is not None:
+      self.clients[source.broker].publish(source.results, payload)
+
+  ## connection
+  def connect(self) -> None:
+    '''Connects to every broker in the background, each serviced on its own network thread, which also reconnects.'''
+
+    for (host, port), client in self.clients.items():
+      client.connect_async(host, port, 60)
+      client.loop_start()
+
+  def disconnect(self) -> None:
+    for client in self.clients.values():
+      client.loop_stop()
+      client.disconnect()
+
+  def close(self) -> None:
+    '''Disconnects, and stops the workers once they finish the cycles in hand.'''
+
+    self.disconnect()
+    with self.condition:
+      self.stopped = True
+      self.condition.notify_all()
+
+
+class AsyncIngest(Ingest):
+  '''An `Ingest` whose brokers are all serviced by one asyncio event loop on a thread of its own, instead of a network thread each.
+
+  Connecting never blocks the caller: every broker is connected in the background, and reconnected with jittered exponential backoff
+  whenever the connection drops or can't be made, so a slow or unreachable broker can't hold up the GUI or the other brokers.
+  Reading from a broker pauses while any of its sources has no free buffer, so a slow pipeline pushes back on the broker instead of dropping cycles.
+  '''
+
+  def __init__(self, sources: list[Source], handle, *, on_retry = None, **kwargs):
+    '''Takes the arguments of `Ingest`, and:
+
+    `on_retry`: called with the `(host, port)` of a broker, the seconds until the next attempt and the error,
+    whenever connecting fails, or the broker refuses the connection or drops it before answering.
+    '''
+
+    super().__init__(sources, handle, **kwargs)
+    self.on_retry = on_retry
+
+    self.loop = asyncio.new_event_loop()
+    self.thread = threading.Thread(target = self.loop.run_forever, name = "ingest-loop", daemon = True)
+    self.thread.start()
+
+    self.tasks = {}
+    self.sockets = {}
+    self.paused = set()
+
+    for broker, client in self.clients.items():
+      client.on_socket_open = partial(self._opened_, broker)
+      client.on_socket_close = partial(self._closed_, broker)
+      client.on_socket_register_write = self._writing_
+      client.on_socket_unregister_write = self._written_
+
+  def _call_(self, callback, *args) -> None:
+    '''A minor inner method to run `callback` on the event loop, straight away if already on it.'''
+
+    if threading.current_thread() is self.thread:
+      callback(*args)
+      return
+
+    try:
+      self.loop.call_soon_threadsafe(callback, *args)
+    except RuntimeError:
+      # the loop has closed, which it only does once every broker is disconnected, so there's nothing left to call
+      pass
+
+  ## socket callbacks, registering each client's socket with the event loop
+  def _opened_(self, broker, client, userdata, sock):
+    self.sockets[broker] = sock.fileno()
+    self._call_(self.loop.add_reader, sock.fileno(), client.loop_read)
+
+  def _closed_(self, broker, client, userdata, sock):
+    self.sockets.pop(broker, None)
+    self.paused.discard(broker)
+    self._call_(self.loop.remove_reader, sock.fileno())
+
+  def _writing_(self, client, userdata, sock):
+    self._call_(self.loop.add_writer, sock.fileno(), client.loop_write)
+
+  def _written_(self, client, userdata, sock):
+    self._call_(self.loop.remove_writer, sock.fileno())
+
+  ## backpressure
+  def receive(self, source, payload, arrival = None):
+    super().receive(source, payload, arrival)
+
+    with self.condition:
+      full = not source.free
+    if full and source.broker in self.sockets and source.broker not in self.paused:
+      self.paused.add(source.broker)
+      self._call_(self.loop.remove_reader, self.sockets[source.broker])
+
+  def _released_(self, source):
+    if source.broker in self.paused:
+      self._call_(self._resume_, source.broker)
+
+  def _resume_(self, broker) -> None:
+    '''A minor inner method to read from `broker` again once every source on it has a free buffer.'''
+
+    with self.condition:
+      ready = all(each.free for each in self.sources if each.broker == broker)
+    if ready and broker in self.paused and broker in self.sockets:
+      self.paused.discard(broker)
+      self.loop.add_reader(self.sockets[broker], self.clients[broker].loop_read)
+
+  ## connection
+  async def _serve_(self, broker: tuple[str, int], client: mqtt.Client) -> None:
+    '''A minor inner method to keep `client` connected to `broker` until cancelled.'''
+
+    shortest, longest = self.backoff
+    delay = shortest
+
+    while True:
+      self.answers.pop(broker, None)
+
+      # connecting resolves the host and opens the socket, which can block, so is done off the loop
+      attempt = self.loop.run_in_executor(None, client.connect, *broker, 60)
+      try:
+        await asyncio.shield(attempt)
+      except asyncio.CancelledError:
+        attempt.add_done_callback(lambda _: self.loop.call_soon_threadsafe(client.disconnect))
+        raise
+      except OSError as error:
+        wait = delay * random.uniform(0.5, 1)
+        if self.on_retry is not None:
+          self.on_retry(broker, wait, error)
+        await asyncio.sleep(wait)
+        delay = min(delay * 2, longest)
+        continue
+
+      # keepalives and timeouts, until the connection is lost
+      while client.loop_misc() == mqtt.MQTT_ERR_SUCCESS:
+        await asyncio.sleep(1)
+
+      # only a connection the broker accepted resets the backoff, so one refusing or dropping it straight away is retried ever less often
+      rc = self.answers.get(broker)
+      if rc == mqtt.CONNACK_ACCEPTED:
+        delay = shortest
+        await asyncio.sleep(shortest * random.uniform(0.5, 1))
+        continue
+
+      if rc is None:
+        error = ConnectionResetError("connection lost before the broker answered")
+      else:
+        error = ConnectionRefusedError(mqtt.connack_string(rc))
+      wait = delay * random.uniform(0.5, 1)
+      if self.on_retry is not None:
+        self.on_retry(broker, wait, error)
+      await asyncio.sleep(wait)
+      delay = min(delay * 2, longest)
+
+  def connect(self):
+    '''Starts connecting to every broker not already being served, returning straight away.'''
+
+    for broker, client in self.clients.items():
+      if broker not in self.tasks:
+        self.tasks[broker] = asyncio.run_coroutine_threadsafe(self._serve_(broker, client), self.loop)
+
+  def disconnect(self):
+    for each in self.tasks.values():
+      each.cancel()
+    self.tasks = {}
+
+    for client in self.clients.values():
+      self.loop.call_soon_threadsafe(client.disconnect)
+
+  def publish(self, source, payload):
+    if source.results is not None:
+      self._call_(self.clients[source.broker].publish, source.results, payload)
+
+  async def _stop_(self) -> None:
+    '''A minor inner method to disconnect from every broker, and stop the event loop once all is closed.'''
+
+    tasks = [asyncio.wrap_future(each) for each in self.tasks.values()]
+    self.tasks = {}
+    for each in tasks:
+      each.cancel()
+    await asyncio.gather(*tasks, return_exceptions = True)
+
+    for client in self.clients.values():
+      client.disconnect()
+    await asyncio.sleep(0.1)
+
+    self.loop.stop()
+
+  def close(self):
+    asyncio.run_coroutine_threadsafe(self._stop_(), self.loop)
+    self.thread.join()
+    self.loop.close()
+
+    with self.condition:
+      self.stopped = True
+      self.condition.notify_all()
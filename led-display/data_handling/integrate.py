@@ -1,15 +1,57 @@
 import numpy as np
-import scipy as sp
 
+from .topology import ring
 
-def integrate_data(data):
+
+def integrate_data(data, time: np.array = ring.time):
   # TODO: implement support for time intervals
+  from scipy.integrate import cumulative_trapezoid
   
   out = []
 
   for each in data:
-    integral = sp.integrate.cumulative_trapezoid(each, x = np.linspace(-0.5, 10.5, 2200))
+    integral = cumulative_trapezoid(each, x = time)
     integral = np.diff(integral)
     out.append(integral)
 
   return out
+
+
+def integrate_windows(data, starts, stops, *, dx = ring.dx) -> np.ndarray:
+  '''Trapezoid integral of each channel over its own sample window.
+
+  `data`: 2D array of channels by samples.
+  `starts`, `stops`: per-channel sample-index windows `[start, stop)`, as int arrays.
+  `dx`: time between adjacent samples.
+
+  Sums are accumulated in float64 whatever the precision of `data`.
+  All channels are summed over their windows by a single `np.add.reduceat` over the flattened frame, rather than slicing each channel separately.
+  '''
+
+  data = np.ascontiguousarray(data)
+  channels, points = data.shape
+  rows = np.arange(channels)
+  flat = data.reshape(-1)
+
+  starts = np.clip(starts, 0, points)
+  stops = np.clip(stops, starts, points)
+
+  # reduceat sums between consecutive bounds, so every other sum is a channel's window
+  bounds = np.empty(2 * channels, dtype = np.intp)
+  bounds[0::2] = rows * points + starts
+  bounds[1::2] = rows * points + stops
+
+  # the last sum runs to the end of the frame anyway, and empty windows only need a valid index
+  if bounds[-1] == flat.size:
+    bounds = bounds[:-1]
+  np.minimum(bounds, flat.size - 1, out = bounds)
+
+  sums = np.add.reduceat(flat, bounds, dtype = np.float64)[0::2]
+
+  # trapezoid over [start, stop) is the plain sum less half of each end sample
+  first = data[rows, np.minimum(starts, points - 1)].astype(np.float64)
+  last = data[rows, np.maximum(stops - 1, 0)].astype(np.float64)
+  out = dx * (sums - (first + last) / 2)
+
+  out[stops - starts < 2] = 0
+  return out
@@ -1,21 +1,22 @@
-import paho.mqtt.client as mqtt
-import numpy as np
-import threading
-import time
 import glob
-import pandas as pd
-import scipy
-import matplotlib.pyplot as plt
-from scipy import integrate
-from scipy.constants import c, m_p, e
-from scipy.optimize import minimize
+from functools import cache
+
+import numpy as np
+
+from .topology import ring
+from .classify import classify
+
+# pandas and SciPy are imported where they are used, so importing this module stays cheap
+
 
 def dataframe(path):
     """Fetch and convert raw data into a numpy array."""
+    import pandas as pd
+
     files = glob.glob(path)
     selected_file = files[0]
     global x_data
-    x_data = np.linspace(-0.5, 10.5, 2200)
+    x_data = ring.time
     input_data = pd.read_csv(selected_file)
     data = input_data.drop(columns=input_data.columns[0]).to_numpy()
 
@@ -39,13 +40,17 @@ def get_integral_updated(x, array):
 
 
 def get_integral(x, value):
-    integral = scipy.integrate.cumulative_trapezoid(value, x=x)
+    from scipy.integrate import cumulative_trapezoid
+
+    integral = cumulative_trapezoid(value, x=x)
     
     return integral
 
 
 def synchrotron_momentum(max_E, time):
     """Calculate synchrotron momentum."""
+    from scipy.constants import c, m_p, e
+
     mpeV = m_p * c**2 / e
     R0 = 26
     n_dip = 10
@@ -69,6 +74,8 @@ def synchrotron_momentum(max_E, time):
 
 def synchrotron_kinetic_energy(max_E, time):
     """Convert time to energy."""
+    from scipy.constants import c, m_p, e
+
     mpeV = m_p * c**2 / e
     return (np.sqrt(synchrotron_momentum(max_E, time)**2 + mpeV**2) - mpeV) / 1E6
 
@@ -116,7 +123,7 @@ def get_calibration_curve(data_points):
     return newton_poly(a_s, BLM_Cal_x_time, time_array)   
     
 
-def calibration_curve_beta(t_min=-0.5, t_max=10.5, data_points=2200, max_E=800):
+def calibration_curve_beta(t_min=ring.start, t_max=ring.end, data_points=ring.points, max_E=800):
     
     BLM_Cal_x_time = np.array([0., 3., 5., 7., 9.])
     # mVs/proton
@@ -184,16 +191,18 @@ def get_integral_updated(x, array):
 
 
 def get_integral(x, value):
-    integral = scipy.integrate.cumulative_trapezoid(value, x=x)
+    from scipy.integrate import cumulative_trapezoid
+
+    integral = cumulative_trapezoid(value, x=x)
     
     return integral
 
-def integrate_data(data):
+def integrate_data(data, time=ring.time):
   integration = []
 
 # Iterating each row of 'b' and append it to 'a'
   for i in range(data.shape[0]):
-    row_integral = get_integral_updated(np.linspace(-1.5, 10.5, 2200), data[i, :])
+    row_integral = get_integral_updated(time, data[i, :])
     integration.append(row_integral)
     integration = np.array(integration)
   return integration
@@ -201,13 +210,20 @@ def integrate_data(data):
 
 
 class VoltProcessor:
-    def __init__(self, data, t1=0, t2=0, coef=None):
+    # names of the categories `judge` returns, by number
+    categories = ("good", "moderate", "bad")
+
+    def __init__(self, data, t1=0, t2=0, coef=None, time=ring.time, thresholds=None):
+        """`t1`, `t2`: the moderate and bad thresholds, each a scalar or one per channel.
+        `thresholds`: ascending levels (by channels, or shared), instead of `t1` and `t2`, for more than three categories."""
         self.data = data
+        self.time = time
         self.t1 = t1
         self.t2 = t2
+        self.thresholds = thresholds
         self.coef = coef
-        self.judgement = []
-        self.integration_by_row = []
+        self.judgement = None
+        self.integration_by_row = None
         self.integration = None
 
     def integrate_data(self):
@@ -215,23 +231,25 @@ class VoltProcessor:
 
 # Iterating each row of 'b' and append it to 'a'
         for i in range(self.data.shape[0]):
-            row_integral = get_integral_updated(np.linspace(-1.5, 10.5, 2200), self.data[i, :])
+            row_integral = get_integral_updated(self.time, self.data[i, :])
             self.integration.append(row_integral)
         self.integration = np.array(self.integration)
 
     def integrate_by_row(self):
-        for row in self.integration:
-            self.integration_by_row.append(np.sum(row))
-        
+        self.integration_by_row = np.sum(self.integration, axis=1)
 
     def judge(self):
-        for i in self.integration_by_row:
-            if self.t1 > i:
-                self.judgement.append('good')
-            elif self.t1 < i < self.t2:
-                self.judgement.append('moderate')
-            else:
-                self.judgement.append('bad')
+        """Category of each row's integral as int8, the number of thresholds it's above; see `categories` for their names.
+
+        An integral equal to `t1` is good, but one equal to `t2` is bad, as it always has been,
+        and so is a NaN integral, as corrupt data mustn't pass for a quiet channel."""
+        thresholds = np.broadcast_arrays(self.t1, self.t2) if self.thresholds is None else self.thresholds
+        self.judgement = classify(self.integration_by_row, thresholds)
+        if self.thresholds is None:
+            # `classify` counts only thresholds strictly exceeded
+            self.judgement[self.integration_by_row == self.t2] = 2
+        # `classify` puts NaN in the lowest category
+        self.judgement[np.isnan(self.integration_by_row)] = len(thresholds)
 
     def judging(self):
         self.integrate_data()
@@ -255,7 +273,7 @@ class ProtonProcessor(VoltProcessor):
 
 # Iterating each row of 'b' and append it to 'a'
         for i in range(self.data.shape[0]):
-            row_integral = get_integral_updated(np.linspace(-1.5, 10.5, 2200), self.data[i, :])
+            row_integral = get_integral_updated(self.time, self.data[i, :])
             self.integration.append(row_integral)
         self.integration = div_coef(self.integration, self.coef) 
         self.integration = np.array(self.integration) * 1e-3
@@ -266,11 +284,11 @@ class ColoumbProcessor(VoltProcessor):
     def integrate_data(self):
         self.integration = []
         for i in range(self.data.shape[0]):
-            row_integral = get_integral_updated(np.linspace(-1.5, 10.5, 2200), self.data[i, :])
+            row_integral = get_integral_updated(self.time, self.data[i, :])
             self.integration.append(row_integral)
         self.integration = div_coef(self.integration, self.coef)
         self.integration = np.array(self.integration) * 1e-3
-        self.integration *= e
+        self.integration *= elementary_charge()
 
 
 
@@ -279,21 +297,37 @@ class JouleProcessor(VoltProcessor):
     def integrate_data(self):
         self.integration = []
         for i in range(self.data.shape[0]):
-            row_integral = get_integral_updated(np.linspace(-1.5, 10.5, 2200), self.data[i, :])
+            row_integral = get_integral_updated(self.time, self.data[i, :])
             self.integration.append(row_integral)
         self.integration = np.array(self.integration) 
-        self.integration *= e
+        self.integration *= elementary_charge()
+
+def elementary_charge():
+    from scipy.constants import e
+
+    return e
+
+
+@cache
+def calibration():
+    """Calibration coefficients of the live data, computed on first use."""
+    return calibration_curve_beta()[:-1]
+
 
-coef = calibration_curve_beta(t_min=-0.5, t_max=10.5, data_points=2200)[:-1]
+def __getattr__(name):
+    # `coef` used to be computed at import time, and is still available under that name
+    if name == "coef":
+        return calibration()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 def lv5judge(data, t1, t2, thtype):
     if thtype == 'volt':
         processor = VoltProcessor(data, t1, t2)
         
     elif thtype == 'proton':
-        processor = ProtonProcessor(data, t1, t2, coef)
+        processor = ProtonProcessor(data, t1, t2, calibration())
     elif thtype == 'coloumbs':
-        processor = ColoumbProcessor(data, t1, t2, coef)
+        processor = ColoumbProcessor(data, t1, t2, calibration())
     elif thtype == 'joules':
         processor = JouleProcessor(data, t1, t2)
     led_result_array = processor.process()
@@ -304,9 +338,9 @@ def lv5judge(data, t1, t2, thtype):
         processor = VoltProcessor(data, t1, t2)
         
     elif thtype == 'proton' or thtype == 'p':
-        processor = ProtonProcessor(data, t1, t2, coef)
+        processor = ProtonProcessor(data, t1, t2, calibration())
     elif thtype == 'coloumbs' or thtype == 'c':
-        processor = ColoumbProcessor(data, t1, t2, coef)
+        processor = ColoumbProcessor(data, t1, t2, calibration())
     elif thtype == 'joules' or thtype == 'j':
         processor = JouleProcessor(data, t1, t2)
     led_result_array = processor.judging()
@@ -314,24 +348,24 @@ def lv5judge(data, t1, t2, thtype):
 
 def live_int(data, thtype): 
     if thtype == 'volt' or thtype == 'v':
-        processor = VoltProcessor(data = data, coef = coef)
+        processor = VoltProcessor(data = data, coef = calibration())
     elif thtype == 'proton' or thtype == 'p':
-        processor = ProtonProcessor(data = data, coef = coef)
+        processor = ProtonProcessor(data = data, coef = calibration())
     elif thtype == 'coloumbs' or thtype == 'c':
-        processor = ColoumbProcessor(data = data, coef = coef)
+        processor = ColoumbProcessor(data = data, coef = calibration())
     elif thtype == 'joules' or thtype == 'J':
-        processor = JouleProcessor(data = data, coef = coef)
+        processor = JouleProcessor(data = data, coef = calibration())
     int_value = processor.integrate_by_unit() 
     return int_value 
 
 def live_int_row(data, thtype): 
     if thtype == 'volt' or thtype == 'v':
-        processor = VoltProcessor(data = data, coef = coef)
+        processor = VoltProcessor(data = data, coef = calibration())
     elif thtype == 'proton' or thtype == 'p':
-        processor = ProtonProcessor(data = data, coef = coef)
+        processor = ProtonProcessor(data = data, coef = calibration())
     elif thtype == 'coloumbs' or thtype == 'c':
-        processor = ColoumbProcessor(data = data, coef = coef)
+        processor = ColoumbProcessor(data = data, coef = calibration())
     elif thtype == 'joules' or thtype == 'J':
-        processor = JouleProcessor(data = data, coef = coef)
+        processor = JouleProcessor(data = data, coef = calibration())
     int_value = processor.intg_list_row()
     return int_value
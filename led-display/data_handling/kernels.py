@@ -0,0 +1,121 @@
+from functools import cache
+
+import numpy as np
+
+from .topology import ring
+from .integrate import integrate_windows
+
+
+def sample_weights(weights: np.array, points: int) -> np.array:
+  '''Per-sample trapezoid weights from per-segment `weights`, padded with a zero at each end.
+
+  Sample `k` borders segments `k - 1` and `k`, so carries half of each of their weights.
+  '''
+
+  padded = np.zeros(points + 1)
+  padded[1:points] = np.ones(points - 1) if weights is None else weights
+  return padded
+
+
+def _numpy_(data, gain, offset, starts, stops, padded, dx, lower, upper, values, states):
+  '''Pure-NumPy form of `integrate_classify`.
+
+  As the trapezoid is linear in the samples, gain and offset are applied to each channel's weighted sums rather than to every sample,
+  leaving one weighting pass and one reduction over the raw data.
+  '''
+
+  channels, points = data.shape
+  rows = np.arange(channels)
+  interior = (padded[:-1] + padded[1:]) / 2
+
+  weighted = np.multiply(data, interior.astype(data.dtype, copy = False))
+  x = integrate_windows(weighted, starts, stops, dx = 1.0)
+
+  # the window's end samples only border the one segment inside it, where `integrate_windows` halved the weights of both they border
+  first, last = np.minimum(starts, points - 1), np.maximum(stops - 1, 0)
+  x += data[rows, first] * (padded[first + 1] - padded[first]) / 4 + data[rows, last] * (padded[last] - padded[last + 1]) / 4
+
+  cumulative = np.concatenate([[0], np.cumsum(interior)])
+  w = cumulative[stops] - cumulative[starts] - padded[first] / 2 - padded[last + 1] / 2
+
+  np.multiply(dx, gain * x + offset * w, out = values)
+  values[stops - starts < 2] = 0
+
+  np.greater(values, lower, out = states, casting = "unsafe")
+  states += values > upper
+
+
+def _loops_(data, gain, offset, starts, stops, padded, dx, lower, upper, values, states):
+  '''Loop form of `integrate_classify`, compiled by Numba: one pass over each channel's window.'''
+
+  for i in range(data.shape[0]):
+    start, stop = starts[i], stops[i]
+    total = 0.0
+
+    if stop - start >= 2:
+      g, o = gain[i], offset[i]
+      previous = g * data[i, start] + o
+
+      for k in range(start + 1, stop):
+        current = g * data[i, k] + o
+        total += (previous + current) * padded[k]
+        previous = current
+
+    values[i] = total * dx / 2
+    states[i] = (values[i] > lower[i]) + (values[i] > upper[i])
+
+
+@cache
+def compiled():
+  '''`_loops_` compiled by Numba, or None where Numba isn't installed.
+
+  Numba is imported on first use, so as not to slow startup.
+  '''
+
+  try:
+    import numba
+  except ImportError:
+    return None
+
+  return numba.njit(cache = True, nogil = True)(_loops_)
+
+
+def integrate_classify(data, gain, offset, starts, stops, lower, upper, *,
+  dx = ring.dx,
+  weights = None,
+  values = None,
+  states = None,
+  jit = True,
+) -> tuple[np.ndarray, np.ndarray]:
+  '''Filters, integrates and classifies every channel of `data` in one fused pass.
+
+  Each channel `i` is taken as `gain[i] * data[i] + offset[i]`, integrated by trapezoid over its window `[starts[i], stops[i])` of samples `dx` apart,
+  weighting each segment by `weights` (such as the inverse of a calibration curve) if given, and judged against `lower[i]` and `upper[i]`.
+  Integrals are accumulated in float64.
+
+  `values`, `states`: preallocated outputs, created if not given.
+  `jit`: use the Numba kernel where Numba is installed, else the pure-NumPy one.
+
+  Returns the integrals, and the states as int8: `0` below `lower`, `1` between the thresholds, `2` above `upper`.
+  '''
+
+  data = np.ascontiguousarray(data)
+  channels, points = data.shape
+
+  starts = np.clip(np.asarray(starts, dtype = np.intp), 0, points)
+  stops = np.clip(np.asarray(stops, dtype = np.intp), starts, points)
+  gain = np.asarray(gain, dtype = np.float64)
+  offset = np.asarray(offset, dtype = np.float64)
+  lower = np.asarray(lower, dtype = np.float64)
+  upper = np.asarray(upper, dtype = np.float64)
+  padded = sample_weights(weights, points)
+
+  if values is None:
+    values = np.empty(channels)
+  if states is None:
+    states = np.empty(channels, dtype = np.int8)
+
+  kernel = (compiled() if jit else None) or _numpy_
+  kernel(data, gain, offset, starts, stops, padded, float(dx), lower, upper, values, states)
+
+  return values, states
@@ -1,34 +1,47 @@
-from copy import deepcopy
-
 import numpy as np
 
 # from energy_ramp import synchrotron_momentum, synchrotron_kinetic_energy
 from .data_filter import DataFilter
 from .time_intervals import TimeInterval
-from .integrate import integrate_data
+from .pipeline import Frame, Pipeline, Select, Invert, Gain, Baselining, Integration
 
 
 def get_data(data, *,
   integrate = True,
   max_energy = 800,
   intervals = None,
+  filterer: DataFilter = None,
 ):
-  ''''''
+  '''Filters, segments and integrates a frame of BLM data.
+
+  `filterer`: a configured filter to take settings from, otherwise one with default settings is used.
+  `intervals`: `(lower, upper)` time window, where each bound is either a scalar or an array with one value per channel.
+  '''
 
-  out = deepcopy(data)
+  get_data.filterer = DataFilter() if filterer is None else filterer
+  settings = get_data.filterer.settings
+  topology = settings.topology
 
-  # segment
-  if intervals != None:
-    interval = TimeInterval()
-    interval.set_intervals(intervals)
-    out = interval.apply(out)[0]
-  
   # filter
-  get_data.filterer = DataFilter()
-  out = get_data.filterer.apply(out)
+  stages = [
+    Select(settings),
+    Invert(settings),
+    Gain(settings),
+    Baselining(settings, get_data.filterer.baseline),
+  ]
+
+  # segment and integrate
+  if integrate:
+    stages.append(Integration(intervals = intervals))
+
+  frame = Pipeline(stages)(Frame(np.array(data, dtype = float), start = topology.start, end = topology.end))
 
-  # integrate
   if integrate:
-    out = integrate_data(out)
+    return frame.values
+
+  if intervals is None:
+    return frame.data
 
-  return out
+  interval = TimeInterval(start = topology.start, end = topology.end, points = frame.data.shape[-1])
+  starts, stops = (np.broadcast_to(each, len(frame.data)) for each in interval.indices(*intervals))
+  return np.where(interval.mask(starts, stops), frame.data, 0)
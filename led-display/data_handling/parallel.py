@@ -0,0 +1,111 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from .pipeline import Frame, Pipeline
+from .profiling import Profiler
+
+
+class Sharded:
+  '''Runs a pipeline over blocks of channels in parallel, on a pool of threads.
+
+  NumPy and SciPy release the GIL inside their loops, so the blocks of a wide installation are filtered and integrated at once.
+  Each block always goes to its own pipeline, built by `build`, so stages that track channels across cycles (baselines, streamed smoothing) stay consistent.
+  Results land in preallocated outputs shared by every block, so a frame's values and states are only valid until the next frame is processed.
+  `frame.data` is left as it came in.
+  '''
+
+  def __init__(self, build, *, workers: int = None, block: int = 64, profiler: Profiler = None):
+    '''`build`: called with no arguments to make each block's `Pipeline`, which shouldn't have a profiler of its own.
+    `workers`: threads to run, by default one per CPU.
+    `block`: fewest channels worth handing to a thread, so narrow frames aren't split finer than it pays off.
+    '''
+
+    self.build = build
+    self.workers = (os.cpu_count() or 1) if workers is None else workers
+    self.block = block
+    self.profiler = profiler
+    self.executor = ThreadPoolExecutor(self.workers, thread_name_prefix = "shard")
+
+    self.shards = []
+    self.pipelines = []
+    self.timings = {}
+
+    self.values = None
+    self.states = None
+    self.kept = None
+
+    if profiler is not None:
+      for each in build().stages:
+        profiler.add(each.name)
+
+  def _shard_(self, channels: int) -> None:
+    '''A minor inner method to split `channels` into contiguous blocks, with a pipeline and outputs for them.'''
+
+    count = max(1, min(self.workers, channels // self.block))
+    bounds = np.linspace(0, channels, count + 1).astype(int)
+
+    self.shards = [slice(start, stop) for start, stop in zip(bounds[:-1], bounds[1:])]
+    self.pipelines = [self.build() for _ in self.shards]
+
+    self.values = np.empty(channels)
+    self.states = np.empty(channels, dtype = np.int8)
+    self.kept = np.empty(channels, dtype = np.bool_)
+
+  def _run_(self, frame: Frame, shard: slice, pipeline: Pipeline) -> Frame:
+    '''A minor inner method to process one block of `frame`, writing its results into the shared outputs.'''
+
+    part = Frame(frame.data[shard], time = frame.time)
+    part.channels = frame.channels[shard]
+    part = pipeline(part)
+
+    # blocks are disjoint, so their writes never overlap, and stages keep the order of channels
+    kept = self.kept[shard]
+    kept[:] = np.isin(frame.channels[shard], part.channels)
+    if part.values is not None:
+      self.values[shard][kept] = part.values
+    if part.states is not None:
+      self.states[shard][kept] = part.states
+
+    return part
+
+  def __call__(self, frame: Frame) -> Frame:
+    if self.values is None or len(self.values) != len(frame.channels):
+      self._shard_(len(frame.channels))
+
+    parts = [
+      self.executor.submit(self._run_, frame, shard, pipeline)
+      for shard, pipeline in zip(self.shards, self.pipelines)
+    ]
+    parts = [each.result() for each in parts]
+
+    frame.time = parts[0].time
+    frame.parts = parts
+    if not self.kept.all():
+      frame.channels = frame.channels[self.kept]
+    if parts[0].values is not None:
+      frame.values = self.values if len(frame.channels) == len(self.values) else self.values[self.kept]
+    if parts[0].states is not None:
+      frame.states = self.states if len(frame.channels) == len(self.states) else self.states[self.kept]
+
+    # blocks run side by side, so each stage took as long as its slowest block
+    for name in parts[0].timings:
+      frame.timings[name] = self.timings[name] = max(each.timings[name] for each in parts)
+
+    if self.profiler is not None:
+      for name, seconds in frame.timings.items():
+        self.profiler.record(name, seconds)
+
+    return frame
+
+  def reset(self) -> None:
+    '''Forgets what every block's pipeline tracks across cycles.'''
+
+    for each in self.pipelines:
+      each.reset()
+
+  def close(self) -> None:
+    '''Stops the threads once any frame in progress is done.'''
+
+    self.executor.shutdown()
@@ -0,0 +1,391 @@
+import time
+
+import numpy as np
+
+from .settings import Settings
+from .topology import ring
+from .baseline import Baseline
+from .smoothing import Smoother
+from .decimate import Decimator
+from .profiling import Profiler
+from .time_intervals import TimeInterval
+from .integrate import integrate_windows
+from .kernels import integrate_classify
+from .classify import classify
+
+
+class Frame:
+  '''A cycle of BLM data, and the results computed from it, as it moves through a pipeline.
+
+  Stages keep the precision of `data`, except integration, which always accumulates in float64.
+  In float32 each sample picks up at most a few rounding errors of 2**-24 relative to its magnitude through conversion and the fused gain/offset,
+  so an integral differs from the float64 one by no more than about `3 * 2**-24 * dx * sum(abs(samples))`.
+  '''
+
+  def __init__(self, data: np.array, *,
+    start = ring.start,
+    end = ring.end,
+    time: np.array = None,
+    dtype = None,
+    sequence: int = None,
+    arrival: float = None,
+  ):
+    '''`data`: 2D array of channels by samples, spanning times `start` to `end`, converted to `dtype` if given.
+
+    `time`: the sample times, such as a topology's, shared instead of building a grid from `start` and `end`.
+    `sequence`, `arrival`: the cycle's number in its stream, and when it arrived on the `time.monotonic` clock, if known.
+    '''
+
+    self.data = data if dtype is None else np.asarray(data, dtype = dtype)
+    self.time = np.linspace(start, end, data.shape[-1]) if time is None else time
+    self.sequence = sequence
+    self.arrival = arrival
+    self.channels = np.arange(len(data))
+    self.values = None
+    self.states = None
+    self.timings = {}
+
+    # each channel's integration window as sample indices, per-channel `(gain, offset)` still to be applied to `data`,
+    # and the blocks a `Sharded` pipeline processed, if any stage set them
+    self.windows = None
+    self.coefficients = None
+    self.parts = None
+
+
+class Stage:
+  '''One step of a pipeline, called with a frame and returning it once processed.
+
+  Stages that are `elementwise` instead provide `coefficients`, and are fused with their neighbours by the pipeline.
+  '''
+
+  name = "stage"
+  elementwise = False
+
+  def __call__(self, frame: Frame) -> Frame:
+    raise NotImplementedError
+
+  def coefficients(self, frame: Frame, gain: np.array, offset: np.array) -> tuple[np.array, np.array]:
+    '''Composes this stage, as `gain * data + offset` per channel, onto the stages before it.
+
+    `frame.data` still holds the input of the whole fused group when this is called.
+    '''
+
+    raise NotImplementedError
+
+  def reset(self) -> None:
+    '''Forgets anything tracked across cycles.'''
+
+
+class Decimation(Stage):
+  '''Downsamples every channel with a `Decimator`, adjusting the frame's time grid to match.'''
+
+  name = "decimation"
+
+  def __init__(self, decimator: Decimator):
+    self.decimator = decimator
+
+  def __call__(self, frame):
+    frame.data, frame.time = self.decimator.apply(frame.data, frame.time)
+    return frame
+
+
+class Select(Stage):
+  '''Keeps only the channels whose filter is active.'''
+
+  name = "select"
+
+  def __init__(self, settings: Settings):
+    self.settings = settings
+
+  def __call__(self, frame):
+    active = self.settings["active"][frame.channels]
+    if not active.all():
+      frame.data = frame.data[active]
+      frame.channels = frame.channels[active]
+    return frame
+
+
+class Invert(Stage):
+  '''Negates the channels with `invert` set.'''
+
+  name = "invert"
+  elementwise = True
+
+  def __init__(self, settings: Settings):
+    self.settings = settings
+
+  def coefficients(self, frame, gain, offset):
+    sign = np.where(self.settings["invert"][frame.channels], -1.0, 1.0)
+    return gain * sign, offset * sign
+
+
+class Gain(Stage):
+  '''Scales each channel by its `scale`, then adds its `offset`.'''
+
+  name = "gain"
+  elementwise = True
+
+  def __init__(self, settings: Settings):
+    self.settings = settings
+
+  def coefficients(self, frame, gain, offset):
+    scale = self.settings["scale"][frame.channels]
+    return gain * scale, offset * scale + self.settings["offset"][frame.channels]
+
+
+class Baselining(Stage):
+  '''Zeroes the channels with `auto_offset` set against their baseline.'''
+
+  name = "baseline"
+  elementwise = True
+
+  def __init__(self, settings: Settings, baseline: Baseline = None):
+    self.settings = settings
+    self.baseline = Baseline() if baseline is None else baseline
+
+  def coefficients(self, frame, gain, offset):
+    rows = np.flatnonzero(self.settings["auto_offset"][frame.channels])
+    if not len(rows):
+      return gain, offset
+
+    # the baseline is estimated from the raw input, then carried through the stages before this one
+    level = self.baseline.update(frame.data[rows], frame.time, frame.channels[rows])
+    offset = offset.copy()
+    offset[rows] -= gain[rows] * level + offset[rows]
+    return gain, offset
+
+  def reset(self):
+    self.baseline.reset()
+
+
+class Smoothing(Stage):
+  '''Filters noise out of every channel with a `Smoother`.'''
+
+  name = "smoothing"
+
+  def __init__(self, smoother: Smoother):
+    self.smoother = smoother
+
+  def __call__(self, frame):
+    frame.data = self.smoother.apply(frame.data, frame.channels)
+    return frame
+
+  def reset(self):
+    self.smoother.reset()
+
+
+class Integration(Stage):
+  '''Integrates each channel over its own time interval.'''
+
+  name = "integration"
+
+  def __init__(self, settings: Settings = None, *, intervals = None):
+    '''Takes the intervals from `settings`, or else `intervals` as a `(lower, upper)` pair of scalars or per-channel arrays.'''
+
+    self.settings = settings
+    self.intervals = intervals
+
+  def windows(self, frame: Frame) -> tuple[np.ndarray, np.ndarray, float]:
+    '''Sample-index windows of each channel in `frame`, and the time between samples.'''
+
+    interval = TimeInterval(start = frame.time[0], end = frame.time[-1], points = len(frame.time))
+
+    if self.settings is not None:
+      lower, upper = self.settings["intervalLower"], self.settings["intervalUpper"]
+    elif self.intervals is not None:
+      lower, upper = np.broadcast_arrays(*self.intervals)
+    else:
+      lower, upper = interval.start, interval.end
+
+    starts, stops = interval.indices(lower, upper)
+    starts = np.broadcast_to(starts, len(frame.channels)) if starts.ndim == 0 else starts[frame.channels]
+    stops = np.broadcast_to(stops, len(frame.channels)) if stops.ndim == 0 else stops[frame.channels]
+
+    return starts, stops, interval.step
+
+  def __call__(self, frame):
+    starts, stops, dx = self.windows(frame)
+    frame.values = integrate_windows(frame.data, starts, stops, dx = dx)
+    frame.windows = starts, stops
+    return frame
+
+
+class Classification(Stage):
+  '''Judges each channel's integral against the thresholds of its current unit.
+
+  States are `0` below the lower threshold, `1` between the thresholds and `2` above the upper one.
+  '''
+
+  name = "classification"
+
+  def __init__(self, settings: Settings):
+    self.settings = settings
+
+  def __call__(self, frame):
+    lower, upper = self.settings.thresholds()
+    frame.states = classify(frame.values, (lower[frame.channels], upper[frame.channels]))
+    return frame
+
+
+class IntegrateClassify(Integration):
+  '''Applies elementwise `stages`, integrates and classifies, all in one kernel that uses Numba where installed.
+
+  The filtered samples are never materialised, so `frame.data` is left as it came in, with the coefficients it needs kept on the frame.
+  '''
+
+  def __init__(self, settings: Settings, stages: list[Stage], *, weights: np.array = None, jit = True):
+    '''`weights`: per-segment trapezoid weights, such as the inverse of a calibration curve.'''
+
+    super().__init__(settings)
+    self.stages = stages
+    self.weights = weights
+    self.jit = jit
+    self.name = "+".join([each.name for each in stages] + ["integration", "classification"])
+
+  def __call__(self, frame):
+    gain = np.ones(len(frame.channels))
+    offset = np.zeros(len(frame.channels))
+
+    for each in self.stages:
+      gain, offset = each.coefficients(frame, gain, offset)
+
+    starts, stops, dx = self.windows(frame)
+    lower, upper = self.settings.thresholds()
+
+    frame.values, frame.states = integrate_classify(frame.data, gain, offset, starts, stops,
+      lower[frame.channels], upper[frame.channels],
+      dx = dx, weights = self.weights, jit = self.jit,
+    )
+    frame.windows = starts, stops
+    frame.coefficients = gain, offset
+    return frame
+
+  def reset(self):
+    for each in self.stages:
+      each.reset()
+
+
+class Fused(Stage):
+  '''Adjacent elementwise stages, applied as a single per-channel `gain * data + offset` into a reused buffer.
+
+  When they compose to the identity, as with no inversion, unit scale and no offsets, the frame is passed on without a pass over it.
+  '''
+
+  elementwise = False
+
+  def __init__(self, stages: list[Stage]):
+    self.stages = stages
+    self.name = "+".join(each.name for each in stages)
+    self.buffer = None
+
+  def __call__(self, frame):
+    gain = np.ones(len(frame.channels))
+    offset = np.zeros(len(frame.channels))
+
+    for each in self.stages:
+      gain, offset = each.coefficients(frame, gain, offset)
+
+    if (gain == 1).all() and not offset.any():
+      return frame
+
+    dtype = frame.data.dtype
+    if self.buffer is None or self.buffer.shape != frame.data.shape or self.buffer.dtype != dtype:
+      self.buffer = np.empty(frame.data.shape, dtype = dtype)
+
+    # coefficients are composed in float64, then applied in the frame's precision
+    np.multiply(frame.data, gain.astype(dtype)[:, None], out = self.buffer)
+    self.buffer += offset.astype(dtype)[:, None]
+
+    frame.data = self.buffer
+    return frame
+
+  def reset(self):
+    for each in self.stages:
+      each.reset()
+
+
+class Pipeline:
+  '''An ordered list of stages that each frame passes through.
+
+  Runs of adjacent elementwise stages are fused, so they cost one pass over the frame between them.
+  The time each stage took on the last frame is kept in `timings`, and on the frame itself, and also recorded by `profiler` if one is given.
+  The fused stages reuse their output buffers, so a frame's data is only valid until the next frame is processed.
+  '''
+
+  def __init__(self, stages: list[Stage], *, profiler: Profiler = None):
+    self.stages = []
+    self.timings = {}
+    self.profiler = profiler
+
+    for each in stages:
+      if not each.elementwise:
+        self.stages.append(each)
+      elif self.stages and isinstance(self.stages[-1], Fused):
+        self.stages[-1].stages.append(each)
+        self.stages[-1].name += f"+{each.name}"
+      else:
+        self.stages.append(Fused([each]))
+
+    if profiler is not None:
+      for each in self.stages:
+        profiler.add(each.name)
+
+  @classmethod
+  def default(cls, settings: Settings, *,
+    baseline: Baseline = None,
+    smoother: Smoother = None,
+    decimator: Decimator = None,
+    integrate = True,
+    classify = True,
+    fused = False,
+    profiler: Profiler = None,
+  ):
+    '''The standard chain: decimate (if a `decimator` is given), select, invert, gain, baseline, smooth (if a `smoother` is given), integrate and classify.
+
+    `fused`: run everything after selection as a single `IntegrateClassify` kernel, where there's no smoothing in between.
+    '''
+
+    if fused and smoother is None and integrate and classify:
+      stages = [] if decimator is None else [Decimation(decimator)]
+      stages += [
+        Select(settings),
+        IntegrateClassify(settings, [Invert(settings), Gain(settings), Baselining(settings, baseline)]),
+      ]
+      return cls(stages, profiler = profiler)
+
+    stages = []
+    if decimator is not None:
+      stages.append(Decimation(decimator))
+
+    stages += [
+      Select(settings),
+      Invert(settings),
+      Gain(settings),
+      Baselining(settings, baseline),
+    ]
+    if smoother is not None:
+      stages.append(Smoothing(smoother))
+    if integrate:
+      stages.append(Integration(settings))
+      if classify:
+        stages.append(Classification(settings))
+
+    return cls(stages, profiler = profiler)
+
+  def __call__(self, frame: Frame) -> Frame:
+    for each in self.stages:
+      start = time.perf_counter()
+      frame = each(frame)
+      frame.timings[each.name] = self.timings[each.name] = time.perf_counter() - start
+
+    if self.profiler is not None:
+      for name, seconds in frame.timings.items():
+        self.profiler.record(name, seconds)
+
+    return frame
+
+  def reset(self) -> None:
+    '''Forgets what every stage tracks across cycles, such as baselines and streamed smoothing.'''
+
+    for each in self.stages:
+      each.reset()
@@ -0,0 +1,149 @@
+import sys
+import time
+
+from bisect import bisect
+from functools import wraps
+
+import numpy as np
+
+
+class Histogram:
+  '''Counts of durations in preallocated, logarithmically spaced bins.
+  '''
+
+  def __init__(self, *, low = 1e-6, high = 10, bins = 240):
+    '''`low`, `high`: range of durations in seconds binned, with anything outside counted in an under- or overflow bin.'''
+
+    self.edges = np.geomspace(low, high, bins + 1)
+    self._edges_ = self.edges.tolist()
+    self.counts = np.zeros(bins + 2, dtype = np.int64)
+    self.max = 0.0
+    self.last = 0.0
+
+  def add(self, seconds: float) -> None:
+    self.counts[bisect(self._edges_, seconds)] += 1
+    self.last = seconds
+    if seconds > self.max:
+      self.max = seconds
+
+  def __len__(self) -> int:
+    return int(self.counts.sum())
+
+  def quantile(self, q: float) -> float:
+    '''Upper edge of the bin holding the `q` quantile, so never an underestimate.'''
+
+    total = len(self)
+    if not total:
+      return 0.0
+
+    index = int(np.searchsorted(np.cumsum(self.counts), q * total))
+    return min(self.max, self._edges_[min(index, len(self._edges_) - 1)])
+
+  def reset(self) -> None:
+    self.counts[:] = 0
+    self.max = 0.0
+    self.last = 0.0
+
+
+class Profiler:
+  '''Collects durations of named stages into histograms, with p50/p99/max summaries.
+
+  Time a block with `with profiler.time("stage"):`, a function with `@profiler.timed("stage")`, or pass a measured duration to `record`.
+  '''
+
+  stages = ("decode", "render", "cycle", "latency")
+
+
+  def __init__(self, stages = stages, **bins):
+    '''`stages`: names to preallocate histograms for, others are added on first use.'''
+
+    self.bins = bins
+    self.histograms = {each: Histogram(**bins) for each in stages}
+
+  def add(self, stage: str) -> Histogram:
+    '''Preallocates the histogram of `stage`, if it has none yet.'''
+
+    histogram = self.histograms.get(stage)
+    if histogram is None:
+      histogram = self.histograms[stage] = Histogram(**self.bins)
+    return histogram
+
+  def record(self, stage: str, seconds: float) -> None:
+    histogram = self.histograms.get(stage)
+    if histogram is None:
+      histogram = self.add(stage)
+    histogram.add(seconds)
+
+  def time(self, stage: str) -> "Timer":
+    '''A context manager recording the time spent in its block under `stage`.'''
+
+    return Timer(self, stage)
+
+  def timed(self, stage: str):
+    '''A decorator recording the time spent in each call under `stage`.'''
+
+    def decorator(function):
+      @wraps(function)
+      def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+          return function(*args, **kwargs)
+        finally:
+          self.record(stage, time.perf_counter() - start)
+      return wrapper
+
+    return decorator
+
+  def summary(self) -> dict[str, dict[str, float]]:
+    '''Count, p50, p99 and max duration in seconds of each stage that has been timed.'''
+
+    return {
+      stage: {
+        "count": len(histogram),
+        "p50": histogram.quantile(0.5),
+        "p99": histogram.quantile(0.99),
+        "max": histogram.max,
+      }
+      for stage, histogram in self.histograms.items() if len(histogram)
+    }
+
+  def status(self) -> str:
+    '''A one-line p50/p99 readout of every stage in milliseconds, for a status bar.'''
+
+    return "   ".join(
+      f"{stage} {each['p50'] * 1e3:.2f}/{each['p99'] * 1e3:.2f}"
+      for stage, each in self.summary().items()
+    )
+
+  def dump(self, file = sys.stdout) -> None:
+    '''Writes a table of every stage's timings in milliseconds to `file`.'''
+
+    print(f"{'stage':<32} {'count':>8} {'p50':>9} {'p99':>9} {'max':>9}", file = file)
+    for stage, each in self.summary().items():
+      print(
+        f"{stage:<32} {each['count']:>8} {each['p50'] * 1e3:>9.3f} {each['p99'] * 1e3:>9.3f} {each['max'] * 1e3:>9.3f}",
+        file = file,
+      )
+
+  def reset(self) -> None:
+    for each in self.histograms.values():
+      each.reset()
+
+
+class Timer:
+  '''Context manager returned by `Profiler.time`.'''
+
+  __slots__ = ("profiler", "stage", "start", "elapsed")
+
+  def __init__(self, profiler: Profiler, stage: str):
+    self.profiler = profiler
+    self.stage = stage
+
+  def __enter__(self):
+    self.start = time.perf_counter()
+    return self
+
+  def __exit__(self, *exc):
+    self.elapsed = time.perf_counter() - self.start
+    self.profiler.record(self.stage, self.elapsed)
+    return False
@@ -0,0 +1,251 @@
+import os
+import tempfile
+import threading
+
+import numpy as np
+
+from .topology import Topology, ring
+
+
+class Settings:
+  '''Per-channel settings held as typed columns, with versioning and change notifications.
+
+  Each setting is a field of a NumPy structured array with one row per channel, so the pipeline can read whole columns at once instead of scanning dicts.
+  Any change bumps `version` and calls each subscribed callback with the setting name and the channel indices that changed.
+  Whoever processes a cycle holds `lock` while doing so, and a loaded profile is swapped in under it, so no cycle sees two profiles.
+  '''
+
+  units = ("volts", "joules", "protons", "coulombs")
+
+  fields = np.dtype([
+    # display
+    ("select", np.bool_),
+    ("shown", np.bool_),
+
+    # segmentation
+    ("intervalLower", np.float64),
+    ("intervalUpper", np.float64),
+
+    # thresholds
+    ("unit", np.int8),
+    ("voltsLower", np.float64),
+    ("voltsUpper", np.float64),
+    ("joulesLower", np.float64),
+    ("joulesUpper", np.float64),
+    ("protonsLower", np.float64),
+    ("protonsUpper", np.float64),
+    ("coulombsLower", np.float64),
+    ("coulombsUpper", np.float64),
+
+    # filter
+    ("active", np.bool_),
+    ("invert", np.bool_),
+    ("scale", np.float64),
+    ("offset", np.float64),
+    ("auto_offset", np.int32), # non-zero to subtract the baseline estimate
+  ])
+
+  defaults = {
+    "select": False,
+    "shown": True,
+    "unit": "volts",
+    "active": True,
+    "invert": False,
+    "scale": 1,
+    "offset": 0,
+    "auto_offset": 0,
+  }
+
+
+  def __init__(self, topology: Topology | int = ring, **defaults):
+    '''Creates a settings store for the channels of `topology`, overriding the default value of any setting given as a keyword.
+
+    `topology`: the installation, or a number of channels named by number; intervals span its time window by default.
+    '''
+
+    self.topology = Topology.numbered(topology) if isinstance(topology, int) else topology
+    self.labels = self.topology.labels
+    self.defaults = {
+      **Settings.defaults,
+      "intervalLower": self.topology.start,
+      "intervalUpper": self.topology.end,
+      **defaults,
+    }
+    self.values = np.zeros(len(self.topology), dtype = Settings.fields)
+    self.version = 0
+    self.callbacks = []
+    self.lock = threading.RLock()
+
+    for setting, state in self.defaults.items():
+      self.values[setting] = self._encode_(setting, state)
+
+  def __len__(self) -> int:
+    return len(self.values)
+
+  def __getitem__(self, setting: str) -> np.ndarray:
+    '''A read-only view of the column holding `setting` for every channel.'''
+
+    column = self.values[setting].view()
+    column.flags.writeable = False
+    return column
+
+  def _index_(self, labels) -> slice | np.ndarray:
+    '''A minor inner method to convert BLM names or indices into an index over the channels.'''
+
+    if labels is None:
+      return slice(None)
+    elif isinstance(labels, (str, int, np.integer)):
+      labels = [labels]
+    elif isinstance(labels, np.ndarray) and labels.dtype == np.bool_:
+      return np.flatnonzero(labels)
+
+    return np.array([
+      self.topology.index(each)
+      for each in labels
+    ], dtype = np.intp)
+
+  def _encode_(self, setting: str, state):
+    '''A minor inner method to convert a unit name to its stored code.'''
+
+    if setting == "unit" and isinstance(state, str):
+      return Settings.units.index(state.lower())
+    return state
+
+  
+  def get(self, setting: str, labels: list[str | int] = None) -> np.ndarray:
+    '''The values of `setting` for a number of BLMs, or all of them if none are specified.'''
+
+    return self.values[setting][self._index_(labels)]
+
+  def set(self, setting: str, state, labels: list[str | int] = None) -> None:
+    '''Configures a `setting` for a number of BLMs, or all of them if none are specified.
+
+    Subscribers are only notified if a value actually changed.
+    '''
+
+    index = self._index_(labels)
+    column = self.values[setting]
+    state = np.asarray(self._encode_(setting, state), dtype = column.dtype)
+
+    if np.array_equal(np.broadcast_to(state, column[index].shape), column[index]):
+      return
+
+    # like a loaded profile, the change lands between cycles
+    with self.lock:
+      column[index] = state
+    self.notify(setting, np.arange(len(self))[index])
+
+  def common(self, setting: str, labels: list[str | int] = None):
+    '''The value of `setting` shared by every given BLM, or `None` if they differ or none are given.'''
+
+    values = self.get(setting, labels)
+    if len(values) == 0 or np.any(values != values[0]):
+      return None
+    return values[0].item()
+
+  def selected(self) -> np.ndarray:
+    '''Indices of the BLMs currently selected in the GUI.'''
+
+    return np.flatnonzero(self.values["select"])
+
+  def unit(self, label: str | int) -> str:
+    '''Name of the unit a BLM's thresholds are currently judged in.'''
+
+    return Settings.units[self.values["unit"][self._index_(label)][0]]
+
+  def thresholds(self) -> tuple[np.ndarray, np.ndarray]:
+    '''Lower and upper thresholds of every channel, in its current unit.
+
+    Rebuilt only when the settings have changed since the last call.
+    '''
+
+    # read first, so thresholds built while a change lands are kept under the version before it, and rebuilt on the next call
+    version = self.version
+    if getattr(self, "_thresholds_", (None,))[0] != version:
+      rows = np.arange(len(self))
+      lower = np.stack([self.values[f"{each}Lower"] for each in Settings.units])
+      upper = np.stack([self.values[f"{each}Upper"] for each in Settings.units])
+      unit = self.values["unit"]
+      self._thresholds_ = (version, lower[unit, rows], upper[unit, rows])
+
+    return self._thresholds_[1:]
+
+  
+  def subscribe(self, callback) -> None:
+    '''Registers `callback(setting, indices)` to be called whenever a setting changes.
+
+    `setting` is `None` when every setting was replaced at once, such as by loading a profile.
+    '''
+
+    self.callbacks.append(callback)
+
+  def unsubscribe(self, callback) -> None:
+    self.callbacks.remove(callback)
+
+  def notify(self, setting: str, indices: np.ndarray) -> None:
+    '''Bumps the version and informs subscribers that `setting` changed for the channels at `indices`.'''
+
+    self.version += 1
+    for callback in list(self.callbacks):
+      callback(setting, indices)
+
+  def save(self, path: str) -> None:
+    '''Saves every setting of every channel as a profile at `path`.
+
+    The profile is written to a temporary file beside `path` and then swapped into place, so a crash mid-save never leaves a partial profile.
+    '''
+
+    directory = os.path.dirname(os.path.abspath(path))
+    handle, temp = tempfile.mkstemp(dir = directory, prefix = ".profile-", suffix = ".npy")
+
+    try:
+      with os.fdopen(handle, "wb") as file:
+        np.save(file, self.values, allow_pickle = False)
+        file.flush()
+        os.fsync(file.fileno())
+      os.replace(temp, path)
+    except BaseException:
+      os.remove(temp)
+      raise
+
+  def load(self, path: str) -> None:
+    '''Loads a profile saved by `save`, replacing all settings in a single step between cycles.
+
+    Settings missing from an older profile keep their defaults, and unknown ones are ignored.
+    Raises `OSError` if the file can't be read, and `ValueError` if it isn't a profile for these channels, leaving the settings unchanged.
+    '''
+
+    try:
+      profile = np.load(path, allow_pickle = False)
+    except EOFError:
+      raise ValueError(f"{path} is empty or cut short") from None
+    except ValueError as error:
+      # such as a file that isn't a NumPy array, holds objects, or is cut short
+      raise ValueError(f"{path} is not a settings profile, or is damaged") from error
+
+    if not isinstance(profile, np.ndarray) or profile.dtype.names is None:
+      raise ValueError(f"{path} is not a settings profile")
+    if profile.shape != (len(self),):
+      raise ValueError(f"{path} holds a profile of shape {profile.shape}, not one row for each of {len(self)} channels")
+
+    shared = set(profile.dtype.names) & set(Settings.fields.names)
+    for setting in shared:
+      if not np.can_cast(profile.dtype[setting], Settings.fields[setting], casting = "same_kind"):
+        raise ValueError(f"{path} holds {setting} as {profile.dtype[setting]}, not {Settings.fields[setting]}")
+
+    values = np.zeros(len(profile), dtype = Settings.fields)
+    for setting, state in self.defaults.items():
+      values[setting] = self._encode_(setting, state)
+    for setting in shared:
+      values[setting] = profile[setting]
+
+    # waits for any cycle being processed, so the next one is the first to see the new profile
+    with self.lock:
+      self.values = values
+    self.notify(None, np.arange(len(values)))
+
+  def reset(self, settings: list[str] = None) -> None:
+    '''Resets a number of settings, or all of them if none are specified, to their defaults.'''
+
+    for setting in (self.defaults if settings is None else settings):
+      self.set(setting, self.defaults.get(setting, 0))
@@ -0,0 +1,85 @@
+import numpy as np
+
+
+class Smoother:
+  '''A causal noise filter applied to every channel at once, optionally carrying each channel's state from one cycle to the next.
+  '''
+
+  kinds = ("moving_average", "savgol", "iir")
+
+
+  def __init__(self, kind = "moving_average", *, width = 5, order = 2, alpha = 0.2, stream = False):
+    '''Creates a smoothing filter.
+
+    `kind`: `"moving_average"` over `width` samples, `"savgol"` (a causal Savitzky-Golay fit of `order` over `width` samples), or `"iir"` (first-order low-pass with weight `alpha` on the newest sample).
+    `stream`: continue each cycle from the filter state at the end of the previous one, instead of settling on its first sample.
+    '''
+
+    from scipy import signal
+
+    match kind:
+      case "moving_average":
+        b, a = np.ones(width) / width, np.ones(1)
+      case "savgol":
+        if not order < width:
+          raise ValueError("Savitzky-Golay order must be less than its width")
+        # fit evaluated at the newest sample in the window, so the filter stays causal
+        b, a = signal.savgol_coeffs(width, order, pos = width - 1), np.ones(1)
+      case "iir":
+        if not 0 < alpha <= 1:
+          raise ValueError("Smoothing factor must be in (0, 1]")
+        b, a = np.array([alpha]), np.array([1, alpha - 1])
+      case _:
+        raise ValueError(f"Unknown smoothing kind {kind!r}")
+
+    self.kind = kind
+    self.b = b
+    self.a = a
+    self.stream = stream
+    # filter state at the end of the last cycle, one row per channel, and which channels were filtered in it
+    self.state = None
+    self.live = None
+    self._zi_ = signal.lfilter_zi(b, a)
+
+  def apply(self, data: np.array, channels: np.array = None) -> np.array:
+    '''Smooths each channel (row) of `data` along its samples.
+
+    `channels`: the channel of each row of `data`, by default `0` onwards; when streaming, each continues from its own state
+    if it was also filtered last cycle, and a channel newly activated starts afresh.
+    '''
+
+    channels = np.arange(len(data)) if channels is None else np.asarray(channels)
+
+    # start as if each channel had been steady at its first sample
+    zi = self._zi_[None, :] * data[:, :1]
+
+    if self.stream and self.state is not None:
+      carried = channels < len(self.live)
+      carried[carried] = self.live[channels[carried]]
+      zi[carried] = self.state[channels[carried]]
+
+    from scipy import signal
+
+    # coefficients in the data's precision, so float32 data isn't promoted
+    b, a = self.b.astype(data.dtype, copy = False), self.a.astype(data.dtype, copy = False)
+    out, final = signal.lfilter(b, a, data, axis = 1, zi = zi.astype(data.dtype, copy = False))
+
+    if self.stream:
+      size = channels.max(initial = -1) + 1
+      if self.state is None or len(self.state) < size:
+        state = np.zeros((size, len(self._zi_)))
+        if self.state is not None:
+          state[:len(self.state)] = self.state
+        self.state = state
+        self.live = np.zeros(size, dtype = np.bool_)
+      self.live[:] = False
+      self.live[channels] = True
+      self.state[channels] = final
+
+    return out
+
+  def reset(self) -> None:
+    '''Forgets the filter state carried between cycles.'''
+
+    self.state = None
+    self.live = None
@@ -1,12 +1,20 @@
 import numpy as np
 
+from .topology import ring
+
 
 class TimeInterval:
-  def __init__(self, *, start = -0.5, end = 10.5, points = 2200):
+  def __init__(self, *, start = ring.start, end = ring.end, points = ring.points):
     self.start = start
     self.end = end
     self.points = points
 
+  @property
+  def step(self) -> float:
+    '''Time between adjacent samples.'''
+
+    return (self.end - self.start) / (self.points - 1)
+
   def set_intervals(self, timeIntervals):
     self.timeIntervals = [
       round((each - self.start) / (self.end - self.start) * self.points)
@@ -21,9 +29,31 @@ class TimeInterval:
     ]
     self.decimalIntervals = list(zip(self.decimalIntervals, self.decimalIntervals[1:]))
     return self.decimalIntervals
+
+  def indices(self, lower, upper) -> tuple[np.ndarray, np.ndarray]:
+    '''Converts per-channel time windows into sample-index windows.
+
+    `lower`, `upper`: window bounds in time, either scalars or one per channel.
+
+    Returns `(starts, stops)` as int arrays, clipped to the sampled range, with `stops >= starts`.
+    '''
+
+    lower, upper = np.broadcast_arrays(np.asarray(lower, dtype = float), np.asarray(upper, dtype = float))
+    scale = self.points / (self.end - self.start)
+
+    starts = np.clip(np.rint((lower - self.start) * scale), 0, self.points).astype(np.intp)
+    stops = np.clip(np.rint((upper - self.start) * scale), 0, self.points).astype(np.intp)
+
+    return starts, np.maximum(starts, stops)
+
+  def mask(self, starts, stops) -> np.ndarray:
+    '''Boolean mask of the samples inside each channel's `[start, stop)` window.'''
+
+    samples = np.arange(self.points)
+    return (samples >= np.asarray(starts)[:, None]) & (samples < np.asarray(stops)[:, None])
   
   def apply(self, data: np.array) -> list[np.array]:
-    return [data[start:end] for start, end in self.timeIntervals]
+    return [data[..., start:end] for start, end in self.timeIntervals]
   
   def sum_times(self, data, signal, pairs):
     return [sum(data[signal][start:end]) for start, end in pairs]
@@ -0,0 +1,90 @@
+import re
+
+import numpy as np
+
+
+class Topology:
+  '''Layout of a BLM installation: its channels, where each one sits in the LED grid, and how every cycle is sampled.
+
+  Everything sized by the installation (buffers, channel indices, the time grid, the LED grid) is derived from one of these once at startup,
+  so another ring or sample rate only needs a different topology.
+  '''
+
+  def __init__(self, labels: list[str], *, positions: list[tuple[int, int] | None] = None, points = 2200, start = -0.5, end = 10.5):
+    '''Creates a topology.
+
+    `labels`: the name of each channel, in the order they arrive in.
+    `positions`: the `(row, col)` of each channel's LED, or `None` for channels without one; by default none have LEDs.
+    `points`: samples per channel per cycle, spanning times `start` to `end`.
+    '''
+
+    self.labels = tuple(labels)
+    self.points = points
+    self.start = start
+    self.end = end
+
+    if positions is None:
+      positions = [None] * len(self.labels)
+    if len(positions) != len(self.labels):
+      raise ValueError("Every channel needs a position, or None")
+
+    # `(-1, -1)` for channels without an LED
+    self.positions = np.array([(-1, -1) if each is None else each for each in positions], dtype = np.intp).reshape(-1, 2)
+    self.positions.flags.writeable = False
+
+    self.placed = self.positions[:, 0] >= 0
+    self.placed.flags.writeable = False
+    self.leds = np.flatnonzero(self.placed)
+    self.rows, self.cols = self.positions.max(axis = 0, initial = -1) + 1
+
+    self.time = np.linspace(start, end, points)
+    self.time.flags.writeable = False
+
+  @classmethod
+  def numbered(cls, count: int, **kwargs):
+    '''A topology of `count` channels named by number, without LEDs.'''
+
+    return cls([f"ch{i}" for i in range(count)], **kwargs)
+
+  def __len__(self) -> int:
+    return len(self.labels)
+
+  @property
+  def shape(self) -> tuple[int, int]:
+    '''Shape of a cycle, as channels by samples.'''
+
+    return len(self.labels), self.points
+
+  @property
+  def dx(self) -> float:
+    '''Time between adjacent samples.'''
+
+    return (self.end - self.start) / (self.points - 1)
+
+  def index(self, label: str | int) -> int:
+    '''Index of the channel named `label`, which may already be an index.'''
+
+    return label if isinstance(label, (int, np.integer)) else self.labels.index(label)
+
+
+def grid(label: str) -> tuple[int, int] | None:
+  '''LED position of a synchrotron BLM named like `r<row>blm<number>`, or `None` for any other channel.'''
+
+  match = re.fullmatch(r"r(\d+)blm(\d+)", label)
+  return None if match is None else (int(match.group(1)), int(match.group(2)) - 1)
+
+
+ring_labels = ["r0blm1", "r0blm3", "r0blm4",
+               "r1blm1", "r1blm2", "r1blm3", "r1blm4",
+               "r2blm1", "r2blm2", "r2blm3", "r2blm4",
+               "r3blm1", "r3blm2", "r3blm3", "r3blm4",
+               "r4blm1", "r4blm2", "r4blm3", "r4blm4",
+               "r5blm1", "r5blm2", "r5blm3", "r5blm4",
+               "r6blm1", "r6blm2", "r6blm3", "r6blm4",
+               "r7blm1", "r7blm2", "r7blm3", "r7blm4",
+               "r8blm1", "r8blm2", "r8blm3", "r8blm4",
+               "r9blm1", "r9blm2", "r9blm3", "r9blm4",
+               "r5im"]
+
+# the ISIS synchrotron: 39 BLMs over 10 superperiods, and the R5 intensity monitor, sampled 2200 times over -0.5 to 10.5 ms
+ring = Topology(ring_labels, positions = [grid(each) for each in ring_labels])
@@ -0,0 +1,73 @@
+import numpy as np
+
+from .topology import Topology
+
+
+class Validator:
+  '''Cheap checks every cycle must pass before it's processed, counting each frame dropped by its reason.
+
+  Checks run cheapest first and stop at the first failure, so a malformed payload costs microseconds rather than a pipeline run and an exception:
+  the payload's length, then whether its samples are all finite, then (if a `limit` is set) whether any is implausibly large.
+  Cycles arriving late enough that some must have been missed are still accepted, and the missed ones counted as `gap`.
+  '''
+
+  reasons = ("size", "nonfinite", "range", "gap")
+
+
+  def __init__(self, topology: Topology, *, period: float = None, limit: float = None):
+    '''`period`: seconds between cycles, to count those missed from arrival times, or `None` not to.
+    `limit`: largest plausible magnitude of a sample, or `None` not to check.
+    '''
+
+    self.shape = topology.shape
+    self.size = topology.shape[0] * topology.shape[1] * np.dtype(float).itemsize
+    self.period = period
+    self.limit = limit
+
+    self.last = None
+    self.counts = dict.fromkeys(("accepted", *Validator.reasons), 0)
+
+  def check(self, payload: bytes, arrival: float = None) -> np.ndarray | None:
+    '''The cycle in `payload` as a read-only channels by samples view, or `None` if it's dropped.
+
+    `arrival`: when the payload arrived on the `time.monotonic` clock, for counting gaps.
+    '''
+
+    if len(payload) != self.size:
+      self.counts["size"] += 1
+      return None
+
+    data = np.frombuffer(payload, dtype = float).reshape(self.shape)
+
+    # any NaN or infinity makes the sum non-finite, as do samples so large they overflow, in one pass with no temporaries
+    with np.errstate(over = "ignore", invalid = "ignore"):
+      total = data.sum()
+    if not np.isfinite(total):
+      self.counts["nonfinite"] += 1
+      return None
+
+    if self.limit is not None and max(data.max(), -data.min()) > self.limit:
+      self.counts["range"] += 1
+      return None
+
+    if self.period is not None and arrival is not None:
+      if self.last is not None:
+        self.counts["gap"] += max(0, round((arrival - self.last) / self.period) - 1)
+      self.last = arrival
+
+    self.counts["accepted"] += 1
+    return data
+
+  def dropped(self) -> int:
+    '''Frames dropped for any reason.'''
+
+    return sum(self.counts[each] for each in Validator.reasons if each != "gap")
+
+  def status(self) -> str:
+    '''One-line summary of the counts, for a status bar.'''
+
+    return "   ".join(f"{name} {count}" for name, count in self.counts.items() if count or name == "accepted")
+
+  def reset(self) -> None:
+    self.last = None
+    self.counts = dict.fromkeys(self.counts, 0)
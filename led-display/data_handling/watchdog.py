@@ -0,0 +1,119 @@
+import numpy as np
+
+
+class Watchdog:
+  '''Tracks processing time per cycle against a budget, stepping through cheaper modes while it is exceeded.
+
+  Modes, in order of increasing savings, are:
+    `0` full: process every frame at full resolution.
+    `1` decimate: process every frame at reduced resolution.
+    `2` stride: only process every `stride`-th frame, at whichever resolution is cheaper.
+
+  Reduced resolution only saves time where the stages after decimation do more per sample than decimating costs,
+  so the processing time at each resolution is smoothed separately in `costs`, seeded by `calibrate`,
+  and the decimate mode is passed over unless it has been measured to save at least `saving` of full resolution's.
+  Every processed frame is still rendered; throttling the repaints is up to the display.
+
+  Each frame's number, as its source numbered it on arrival, is passed to `admit`, and the time taken to process it to `record`;
+  frames skipped are remembered by that number, so they match the cycles shown, whatever ingest dropped before them.
+  The mode steps up when the smoothed processing time exceeds the budget, and back down once it falls below `low` of the budget, holding for `hold` processed frames between steps.
+  '''
+
+  modes = ("full", "decimate", "stride")
+
+
+  def __init__(self, budget = 0.02, *, stride = 4, decimation = True, saving = 0.1, alpha = 0.2, low = 0.5, hold = 10, history = 1024):
+    '''Creates a watchdog.
+
+    `budget`: processing time allowed per cycle, in seconds.
+    `stride`: in the last mode, the frames processed are one in every `stride`.
+    `decimation`: whether frames can be processed at reduced resolution at all.
+    `saving`: least fraction of the processing time reduced resolution must save to be used, as it also costs accuracy.
+    `alpha`: weight of the newest cycle in the smoothed processing times.
+    `history`: number of skipped frame numbers remembered.
+    '''
+
+    self.budget = budget
+    self.stride = stride
+    self.decimation = decimation
+    self.saving = saving
+    self.alpha = alpha
+    self.low = low
+    self.hold = hold
+
+    self.level = 0
+    self.load = 0.0
+    self.held = 0
+    # smoothed processing time at full and at reduced resolution, NaN until measured
+    self.costs = np.full(2, np.nan)
+    # lowest frame number the next frame processed while striding may have
+    self.due = 0
+
+    self.skipped = np.full(history, -1, dtype = np.int64)
+    self.skips = 0
+
+  @property
+  def mode(self) -> str:
+    return Watchdog.modes[self.level]
+
+  @property
+  def cheaper(self) -> bool:
+    '''Whether reduced resolution is available and not measured to save less than `saving`; it's tried until measured.'''
+
+    return self.decimation and not self.costs[1] > (1 - self.saving) * self.costs[0]
+
+  @property
+  def decimate(self) -> bool:
+    '''Whether frames should be processed at reduced resolution.'''
+
+    return self.level == 1 or (self.level == 2 and self.cheaper)
+
+  def calibrate(self, full: float, decimated: float) -> None:
+    '''Seeds the processing time at each resolution, such as from timing both pipelines once before the first cycle.'''
+
+    self.costs[:] = full, decimated
+
+  def admit(self, sequence: int) -> bool:
+    '''Counts the newly arrived frame numbered `sequence` by its source, returning whether it should be processed.'''
+
+    # frames already dropped don't count towards the stride, so one in every `stride` numbers is still processed
+    if self.level < 2 or sequence >= self.due:
+      self.due = sequence + self.stride
+      return True
+
+    self.skipped[self.skips % len(self.skipped)] = sequence
+    self.skips += 1
+    return False
+
+  def record(self, seconds: float, cost: float = None) -> None:
+    '''Accounts for the time taken to process the last admitted frame, changing mode if needed.
+
+    `cost`: the part of `seconds` spent in the pipeline, which is all that differs between resolutions, or all of it if not given.
+    '''
+
+    self.load += self.alpha * (seconds - self.load)
+
+    cost = seconds if cost is None else cost
+    resolution = int(self.decimate)
+    smoothed = self.costs[resolution]
+    self.costs[resolution] = cost if np.isnan(smoothed) else smoothed + self.alpha * (cost - smoothed)
+
+    self.held += 1
+    if self.held < self.hold:
+      return
+
+    if self.load > self.budget and self.level < len(Watchdog.modes) - 1:
+      self.level = 1 if self.level == 0 and self.cheaper else 2
+      self.held = 0
+    elif self.load < self.low * self.budget and self.level > 0:
+      self.level = 1 if self.level == 2 and self.cheaper else 0
+      self.held = 0
+
+  def recent(self) -> np.ndarray:
+    '''Numbers of the frames most recently skipped, oldest first.'''
+
+    count = min(self.skips, len(self.skipped))
+    return np.roll(self.skipped, -self.skips)[len(self.skipped) - count:]
+
+  def status(self) -> str:
+    return f"{self.mode}, {self.load * 1e3:.1f}/{self.budget * 1e3:.0f} ms, {self.skips} skipped"
@@ -3,68 +3,156 @@ LED Display
 Main GUI
 '''
 
+import os
 import sys
+import time
+import threading
+import importlib
 import multiprocessing
 
-from copy import deepcopy
 from functools import partial
 
 import numpy as np
-import paho.mqtt.client as mqtt
 
 from PyQt5 import QtCore as qc
 from PyQt5 import QtWidgets as qw
 
 
-from data_handling.main import get_data
-from data_handling.data_filter import DataFilter
+from data_handling.settings import Settings
+from data_handling.topology import Topology, ring
+from data_handling.pipeline import Frame, Pipeline
+from data_handling.kernels import integrate_classify
+from data_handling.parallel import Sharded
+from data_handling.smoothing import Smoother
+from data_handling.decimate import Decimator
+from data_handling.profiling import Profiler
+from data_handling.watchdog import Watchdog
+from data_handling.ingest import Source, Ingest, AsyncIngest
+from data_handling.validate import Validator
+from data_handling.alarms import Alarms
+from data_handling.events import EventLog
+
+from waveform import Waveform
 
 
 ### constants
 class config:
-  count = 39
-  
+  # channels, LED grid and sampling of the installation, from which every buffer, index and LED is sized at startup
+  topology = ring
+
   multiselect = False
   connected = False
 
-  settings = [deepcopy({
-    "select": False,
-    "shown": True,
-    "intervalLower": -0.5,
-    "intervalUpper": 10.5,
-    "unit": "volts",
-    "voltsLower": -0.05229529921101352,
-    "voltsUpper": 0.007973001229908228,
-    "joulesLower": -8.378630646392451e-21,
-    "joulesUpper": 1.2774156273412224e-21,
-    "protonsLower": -67432701825.388306,
-    "protonsUpper": 27743252085.485558,
-    "coulombsLower": -1.0803909923212628e-08,
-    "coulombsUpper": 4.444959024253673e-09,
-  }) for i in range(count)]
-
-  class data:
-    start = -0.5
-    stop = 10.5
+  # settings profile loaded at start, and offered by default when saving
+  profile = os.path.join(os.path.dirname(os.path.abspath(__file__)), "profile.npy")
+
+  settings = Settings(topology,
+    select = False,
+    shown = True,
+    unit = "volts",
+    voltsLower = -0.05229529921101352,
+    voltsUpper = 0.007973001229908228,
+    joulesLower = -8.378630646392451e-21,
+    joulesUpper = 1.2774156273412224e-21,
+    protonsLower = -67432701825.388306,
+    protonsUpper = 27743252085.485558,
+    coulombsLower = -1.0803909923212628e-08,
+    coulombsUpper = 4.444959024253673e-09,
+  )
+
+  class ingest:
+    # "asyncio" services every broker from one event loop thread, pausing reads while processing is behind;
+    # "threads" uses a paho network thread per broker, dropping the oldest cycles instead
+    core = "asyncio"
+
+    # threads processing cycles, taking the sources in turn
+    workers = 1
+
+    # shortest and longest wait in seconds between attempts to reach a broker
+    backoff = (0.5, 30)
+
+  class pipeline:
+    # keyword arguments of `Smoother`, e.g. {"kind": "savgol", "width": 11, "stream": True}, or None to integrate the raw traces
+    smoothing = None
+
+    # keyword arguments of `Decimator`, e.g. {"factor": 10}, or None for full resolution; it's only cheaper with an automatic offset
+    # or smoothing, and slower with the defaults, see `benchmarks/decimation.py`
+    decimation = None
+
+    # "float32" halves the memory traffic of processing, with integrals still accumulated in float64,
+    # see `Frame` for the error bound and `benchmarks/precision.py` to measure it
+    precision = "float64"
+
+    # True to run everything after selection as one integrate-and-classify kernel, compiled by Numba where installed
+    # (only without smoothing), see `benchmarks/bench_kernels.py`
+    fused = False
+
+    # threads to split the channels over, or None to process them all on one; see `benchmarks/channels.py` for when it pays off
+    workers = None
+
+    # show stage timings in the status bar, and print them on exit
+    profiling = False
+
+  # streams of BLM cycles to monitor, each processed with its own pipelines; the first is shown on the LEDs
+  sources = [
+    Source("ring", "ac_phys/workxp/live_signals", host = "130.246.57.45", port = 8883, topology = topology, settings = settings,
+      # the synchrotron cycles at 50 Hz; set `limit` to also drop cycles with implausibly large samples
+      validator = Validator(topology, period = 0.02),
+      # cycles are decoded straight into buffers of the processing precision
+      dtype = pipeline.precision,
+    ),
+  ]
+
+  class watchdog:
+    # processing time allowed per machine cycle, in seconds
+    budget = 0.02
+    # decimation factor, tried first when over budget if it's measured to save time, then frame stride
+    factor = 10
+    stride = 4
+
+  class alarms:
+    # cycles out of the most recent in which a channel must agree before its LED changes colour
+    count = 3
+    window = 5
+    # how far below a threshold a channel must fall to clear it, as a fraction of the gap between the thresholds;
+    # with `count = window = 1` and no hysteresis, LEDs follow every cycle
+    hysteresis = 0.1
+
+  class events:
+    # CSV file every alarm level change is appended to, and read back from at start, or None to keep them in memory only
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "events.csv")
+    # seconds of past events read back, or None for the whole file
+    history = 7 * 24 * 3600
 
   class screen:
     x = 1600
     y = 900
 
   class leds:
-    rows = 10
-    cols = 4
     size = 50
     space = round(size / 2)
 
+    # "stylesheet" restyles every LED on each refresh, "cached" only those whose style changed
+    renderer = "cached"
+    # most LED repaints a second, however fast cycles are processed
+    rate = 25
+
     class style:
       class col:
         idle = "#888"
+        # channels without a value, such as those filtered out
+        void = "#444"
         norm = "#70c720"
         concern = "#ffc720"
         doom = "#ff0040"
         crash = "#ff0090"
 
+  class plot:
+    # most selected channels plotted at once, most repaints a second, and height in pixels of the plot
+    curves = 4
+    rate = 25
+    height = 600
+
   class buttons:
     x = 100
     y = 40
@@ -80,40 +168,77 @@ class config:
 ### main window
 class Core(qw.QMainWindow):
 
+  # LEDs to restyle, and when the cycle they show arrived, sent from the processing thread to the GUI thread
+  rendering = qc.pyqtSignal(object, object)
+
   ## setup
   def __init__(self, queue):
     super().__init__()
+    self.rendering.connect(self.render, qc.Qt.QueuedConnection)
 
     ## MQTT
     self.data = []
+    self.source = config.sources[0]
     self.queue = queue
-
-    def on_connect(client, userdata, flags, rc):
-      print("MQTT: CONNECTED!")
-      client.subscribe("ac_phys/workxp/live_signals")
+    self.profiler = Profiler()
+    self.watchdog = Watchdog(config.watchdog.budget, stride = config.watchdog.stride)
+    self.alarms = Alarms(len(config.topology),
+      count = config.alarms.count, window = config.alarms.window, hysteresis = config.alarms.hysteresis)
+    self.events = EventLog(config.topology, config.events.path, history = config.events.history)
+    # LEDs whose style changed since they were last restyled, marked from any thread under `marking` and swapped with `spare` to repaint,
+    # which channels had no value in the last cycle, when the LEDs were last restyled, and whether a repaint is still queued
+    self.stale = np.zeros(len(config.topology), dtype = bool)
+    self.spare = np.zeros(len(config.topology), dtype = bool)
+    self.marking = threading.Lock()
+    self.missing = np.ones(len(config.topology), dtype = bool)
+    self.painted = 0.0
+    self.painting = False
+    self.pipelines = []
+    self.ready = threading.Event()
+
+    # which of the display source's pipelines ran last, full resolution or decimated
+    self.decimating = 0
+
+    # number of the last cycle shown, and how many cycles have arrived since
+    self.shown = 0
+    self.behind = 0
+
+    def on_connect(broker):
+      print(f"MQTT: CONNECTED TO {broker[0]}:{broker[1]}!")
       config.connected = True
+      # every LED leaves idle with the next cycle shown, whether or not its level changes
+      self.mark()
 
-    def on_message(client, userdata, msg):
-      msg_byte = msg.payload
-      msg_array = np.frombuffer(msg_byte, dtype = float, count = -1, offset = 0)
-      msg_data = np.reshape(msg_array, (40, 2200))
-
-      self.data = get_data(msg_data, intervals = [config.data.start, config.data.stop])
-      self.update_all()
-
-      print("\ncycle executed\n")
-
-    def on_disconnect(client, userdata, rc):
+    def on_disconnect(broker, rc):
       config.connected = False
+      # no cycles come to restyle the LEDs, so they're returned to idle now
+      self.mark()
+      self.rendering.emit(None, None)
       if rc != 0:
-        print("MQTT: UNEXPECTED DISCONNECT!")
+        print(f"MQTT: UNEXPECTED DISCONNECT FROM {broker[0]}:{broker[1]}!")
       else:
-        print("MQTT: DISCONNECTED!")
-
-    self.client = mqtt.Client()
-    self.client.on_connect = on_connect
-    self.client.on_message = on_message
-    self.client.on_disconnect = on_disconnect
+        print(f"MQTT: DISCONNECTED FROM {broker[0]}:{broker[1]}!")
+
+    def on_retry(broker, delay, error):
+      print(f"MQTT: CANNOT CONNECT TO {broker[0]}:{broker[1]} ({error}), RETRYING IN {delay:.1f} s")
+
+    if config.ingest.core == "asyncio":
+      self.ingest = AsyncIngest(config.sources, self.process,
+        workers = config.ingest.workers,
+        backoff = config.ingest.backoff,
+        on_connect = on_connect,
+        on_disconnect = on_disconnect,
+        on_retry = on_retry,
+        profiler = self.profiler,
+      )
+    else:
+      self.ingest = Ingest(config.sources, self.process,
+        workers = config.ingest.workers,
+        backoff = config.ingest.backoff,
+        on_connect = on_connect,
+        on_disconnect = on_disconnect,
+        profiler = self.profiler,
+      )
 
 
     ## PyQt
@@ -127,15 +252,15 @@ class Core(qw.QMainWindow):
     # led grid
     self.ledGridWidget = qw.QWidget(self.root)
     self.ledGridWidget.setGeometry(qc.QRect(50, 50,
-      (config.leds.size + config.leds.space) * config.leds.cols + config.leds.space,
-      (config.leds.size + config.leds.space) * config.leds.rows + config.leds.space,
+      (config.leds.size + config.leds.space) * config.topology.cols + config.leds.space,
+      (config.leds.size + config.leds.space) * config.topology.rows + config.leds.space,
     ))
     self.ledGridLayout = qw.QGridLayout(self.ledGridWidget)
 
-    self.create_leds(config.leds.rows, config.leds.cols, skip = [2])
+    self.create_leds(config.topology)
 
     # row labels
-    for i in range(config.leds.rows):
+    for i in range(config.topology.rows):
       label = vars(self)[f"row{i+1}"] = qw.QLabel(self.root)
       label.setText(f"R{i}")
       label.setGeometry(qc.QRect(25,
@@ -143,7 +268,7 @@ class Core(qw.QMainWindow):
       25, 25))
 
     # col labels
-    for i in range(config.leds.cols):
+    for i in range(config.topology.cols):
       label = vars(self)[f"col{i+1}"] = qw.QLabel(self.root)
       label.setText(f"BLM{i+1}")
       label.setGeometry(qc.QRect(
@@ -155,7 +280,7 @@ class Core(qw.QMainWindow):
     self.buttonSelect.setText("Select")
     self.buttonSelect.setGeometry(qc.QRect(
       50 + config.leds.space,
-      50 + (config.leds.size + config.leds.space) * config.leds.rows + config.leds.space,
+      50 + (config.leds.size + config.leds.space) * config.topology.rows + config.leds.space,
       config.buttons.x,
       config.buttons.y,
     ))
@@ -167,7 +292,7 @@ class Core(qw.QMainWindow):
     self.buttonSelectAll.setText("Select All")
     self.buttonSelectAll.setGeometry(qc.QRect(
       50 + config.leds.space * 2 + config.buttons.x,
-      50 + (config.leds.size + config.leds.space) * config.leds.rows + config.leds.space,
+      50 + (config.leds.size + config.leds.space) * config.topology.rows + config.leds.space,
       config.buttons.x,
       config.buttons.y,
     ))
@@ -180,18 +305,48 @@ class Core(qw.QMainWindow):
     self.buttonConnect.setText("Connect")
     self.buttonConnect.setGeometry(qc.QRect(
       50 + config.leds.space * 3 + config.buttons.x * 2,
-      50 + (config.leds.size + config.leds.space) * config.leds.rows + config.leds.space,
+      50 + (config.leds.size + config.leds.space) * config.topology.rows + config.leds.space,
       config.buttons.x,
       config.buttons.y,
     ))
     self.buttonConnect.state = False
     self.buttonConnect.clicked.connect(partial(self.operate, "buttonConnect"))
 
+    # profile buttons
+    self.buttonSave = qw.QPushButton(self.root)
+    self.buttonSave.setText("Save")
+    self.buttonSave.setGeometry(qc.QRect(
+      50 + config.leds.space * 4 + config.buttons.x * 3,
+      50 + (config.leds.size + config.leds.space) * config.topology.rows + config.leds.space,
+      config.buttons.x,
+      config.buttons.y,
+    ))
+    self.buttonSave.clicked.connect(partial(self.operate, "buttonSave"))
+
+    self.buttonLoad = qw.QPushButton(self.root)
+    self.buttonLoad.setText("Load")
+    self.buttonLoad.setGeometry(qc.QRect(
+      50 + config.leds.space * 5 + config.buttons.x * 4,
+      50 + (config.leds.size + config.leds.space) * config.topology.rows + config.leds.space,
+      config.buttons.x,
+      config.buttons.y,
+    ))
+    self.buttonLoad.clicked.connect(partial(self.operate, "buttonLoad"))
+
+    # waveform plot, right of the thresholds
+    self.plot = Waveform(config.topology, self.root, curves = config.plot.curves, rate = config.plot.rate)
+    self.plot.setGeometry(qc.QRect(
+      50 + (config.leds.size + config.leds.space) * config.topology.cols + config.leds.space + 200 + config.inputs.x * 2 + 100,
+      50,
+      config.screen.x - ((config.leds.size + config.leds.space) * config.topology.cols + config.leds.space + 200 + config.inputs.x * 2 + 200),
+      config.plot.height,
+    ))
+
     # selected BLM
     self.selectedLabel = qw.QLabel(self.root)
     self.selectedLabel.setText("-")
     self.selectedLabel.setGeometry(
-      50 + (config.leds.size + config.leds.space) * config.leds.cols + config.leds.space + 50,
+      50 + (config.leds.size + config.leds.space) * config.topology.cols + config.leds.space + 50,
     50, 500, 75)
     self.selectedLabel.setStyleSheet(f"font-family: {config.style.font}, Segoe UI; font-size: 24pt")
 
@@ -199,7 +354,7 @@ class Core(qw.QMainWindow):
     self.checkboxShown = qw.QCheckBox(self.root)
     self.checkboxShown.setText("Display")
     self.checkboxShown.setGeometry(
-      50 + (config.leds.size + config.leds.space) * config.leds.cols + config.leds.space + 50,
+      50 + (config.leds.size + config.leds.space) * config.topology.cols + config.leds.space + 50,
     150, 250, 50)
     self.checkboxShown.setEnabled(False)
     self.checkboxShown.setTristate(True)
@@ -208,31 +363,31 @@ class Core(qw.QMainWindow):
     # unit checkboxes
     self.labelUnit = qw.QLabel(self.root)
     self.labelUnit.setGeometry(qc.QRect(
-      50 + (config.leds.size + config.leds.space) * config.leds.cols + config.leds.space + 50,
+      50 + (config.leds.size + config.leds.space) * config.topology.cols + config.leds.space + 50,
     250, 100, 20))
     self.labelUnit.setText("Unit")
 
     self.radioVolts = qw.QRadioButton(self.root)
     self.radioVolts.setGeometry(qc.QRect(
-      50 + (config.leds.size + config.leds.space) * config.leds.cols + config.leds.space + 50,
+      50 + (config.leds.size + config.leds.space) * config.topology.cols + config.leds.space + 50,
     300, 100, 20))
     self.radioVolts.setText("Volts")
     self.radioVolts.clicked.connect(partial(self.operate, "radioVolts"))
     self.radioJoules = qw.QRadioButton(self.root)
     self.radioJoules.setGeometry(qc.QRect(
-      50 + (config.leds.size + config.leds.space) * config.leds.cols + config.leds.space + 50,
+      50 + (config.leds.size + config.leds.space) * config.topology.cols + config.leds.space + 50,
     350, 100, 20))
     self.radioJoules.setText("Joules")
     self.radioJoules.clicked.connect(partial(self.operate, "radioJoules"))
     self.radioProtons = qw.QRadioButton(self.root)
     self.radioProtons.setGeometry(qc.QRect(
-      50 + (config.leds.size + config.leds.space) * config.leds.cols + config.leds.space + 50,
+      50 + (config.leds.size + config.leds.space) * config.topology.cols + config.leds.space + 50,
     400, 100, 20))
     self.radioProtons.setText("Protons")
     self.radioProtons.clicked.connect(partial(self.operate, "radioProtons"))
     self.radioCoulombs = qw.QRadioButton(self.root)
     self.radioCoulombs.setGeometry(qc.QRect(
-      50 + (config.leds.size + config.leds.space) * config.leds.cols + config.leds.space + 50,
+      50 + (config.leds.size + config.leds.space) * config.topology.cols + config.leds.space + 50,
     450, 100, 20))
     self.radioCoulombs.setText("Coulombs")
     self.radioCoulombs.clicked.connect(partial(self.operate, "radioCoulombs"))
@@ -240,231 +395,435 @@ class Core(qw.QMainWindow):
     # threshold input
     self.labelThreshold = qw.QLabel(self.root)
     self.labelThreshold.setGeometry(qc.QRect(
-      50 + (config.leds.size + config.leds.space) * config.leds.cols + config.leds.space + 200,
+      50 + (config.leds.size + config.leds.space) * config.topology.cols + config.leds.space + 200,
     250, 100, 20))
     self.labelThreshold.setText("Thresholds")
 
     self.inputVoltsLower = qw.QLineEdit(self.root)
     self.inputVoltsLower.setMaximumSize(qc.QSize(400, 50))
     self.inputVoltsLower.setGeometry(qc.QRect(
-      50 + (config.leds.size + config.leds.space) * config.leds.cols + config.leds.space + 200,
+      50 + (config.leds.size + config.leds.space) * config.topology.cols + config.leds.space + 200,
     300, config.inputs.x, config.inputs.y))
-    self.inputVoltsLower.setText(str(config.settings[0]["voltsLower"]))
+    self.inputVoltsLower.setText(str(config.settings.get("voltsLower", 0)[0]))
     self.inputVoltsLower.textChanged.connect(partial(self.operate, "inputVoltsLower", "volts", "lower"))
     self.inputJoulesLower = qw.QLineEdit(self.root)
     self.inputJoulesLower.setMaximumSize(qc.QSize(400, 50))
     self.inputJoulesLower.setGeometry(qc.QRect(
-      50 + (config.leds.size + config.leds.space) * config.leds.cols + config.leds.space + 200,
+      50 + (config.leds.size + config.leds.space) * config.topology.cols + config.leds.space + 200,
     350, config.inputs.x, config.inputs.y))
-    self.inputJoulesLower.setText(str(config.settings[0]["joulesLower"]))
+    self.inputJoulesLower.setText(str(config.settings.get("joulesLower", 0)[0]))
     self.inputJoulesLower.textChanged.connect(partial(self.operate, "inputJoulesLower", "joules", "lower"))
     self.inputProtonsLower = qw.QLineEdit(self.root)
     self.inputProtonsLower.setMaximumSize(qc.QSize(400, 50))
     self.inputProtonsLower.setGeometry(qc.QRect(
-      50 + (config.leds.size + config.leds.space) * config.leds.cols + config.leds.space + 200,
+      50 + (config.leds.size + config.leds.space) * config.topology.cols + config.leds.space + 200,
     400, config.inputs.x, config.inputs.y))
-    self.inputProtonsLower.setText(str(config.settings[0]["protonsLower"]))
+    self.inputProtonsLower.setText(str(config.settings.get("protonsLower", 0)[0]))
     self.inputProtonsLower.textChanged.connect(partial(self.operate, "inputProtonsLower", "protons", "lower"))
     self.inputCoulombsLower = qw.QLineEdit(self.root)
     self.inputCoulombsLower.setMaximumSize(qc.QSize(400, 50))
     self.inputCoulombsLower.setGeometry(qc.QRect(
-      50 + (config.leds.size + config.leds.space) * config.leds.cols + config.leds.space + 200,
+      50 + (config.leds.size + config.leds.space) * config.topology.cols + config.leds.space + 200,
     450, config.inputs.x, config.inputs.y))
-    self.inputCoulombsLower.setText(str(config.settings[0]["coulombsLower"]))
+    self.inputCoulombsLower.setText(str(config.settings.get("coulombsLower", 0)[0]))
     self.inputCoulombsLower.textChanged.connect(partial(self.operate, "inputCoulombsLower", "coulombs", "lower"))
 
     self.inputVoltsUpper = qw.QLineEdit(self.root)
     self.inputVoltsUpper.setMaximumSize(qc.QSize(400, 50))
     self.inputVoltsUpper.setGeometry(qc.QRect(
-      50 + (config.leds.size + config.leds.space) * config.leds.cols + config.leds.space + 200 + config.inputs.x + 50,
+      50 + (config.leds.size + config.leds.space) * config.topology.cols + config.leds.space + 200 + config.inputs.x + 50,
     300, config.inputs.x, config.inputs.y))
-    self.inputVoltsUpper.setText(str(config.settings[0]["voltsUpper"]))
+    self.inputVoltsUpper.setText(str(config.settings.get("voltsUpper", 0)[0]))
     self.inputVoltsUpper.textChanged.connect(partial(self.operate, "inputVoltsUpper", "volts", "upper"))
     self.inputJoulesUpper = qw.QLineEdit(self.root)
     self.inputJoulesUpper.setMaximumSize(qc.QSize(400, 50))
     self.inputJoulesUpper.setGeometry(qc.QRect(
-      50 + (config.leds.size + config.leds.space) * config.leds.cols + config.leds.space + 200 + config.inputs.x + 50,
+      50 + (config.leds.size + config.leds.space) * config.topology.cols + config.leds.space + 200 + config.inputs.x + 50,
     350, config.inputs.x, config.inputs.y))
-    self.inputJoulesUpper.setText(str(config.settings[0]["joulesUpper"]))
+    self.inputJoulesUpper.setText(str(config.settings.get("joulesUpper", 0)[0]))
     self.inputJoulesUpper.textChanged.connect(partial(self.operate, "inputJoulesUpper", "joules", "upper"))
     self.inputProtonsUpper = qw.QLineEdit(self.root)
     self.inputProtonsUpper.setMaximumSize(qc.QSize(400, 50))
     self.inputProtonsUpper.setGeometry(qc.QRect(
-      50 + (config.leds.size + config.leds.space) * config.leds.cols + config.leds.space + 200 + config.inputs.x + 50,
+      50 + (config.leds.size + config.leds.space) * config.topology.cols + config.leds.space + 200 + config.inputs.x + 50,
     400, config.inputs.x, config.inputs.y))
-    self.inputProtonsUpper.setText(str(config.settings[0]["protonsUpper"]))
+    self.inputProtonsUpper.setText(str(config.settings.get("protonsUpper", 0)[0]))
     self.inputProtonsUpper.textChanged.connect(partial(self.operate, "inputProtonsUpper", "protons", "upper"))
     self.inputCoulombsUpper = qw.QLineEdit(self.root)
     self.inputCoulombsUpper.setMaximumSize(qc.QSize(400, 50))
     self.inputCoulombsUpper.setGeometry(qc.QRect(
-      50 + (config.leds.size + config.leds.space) * config.leds.cols + config.leds.space + 200 + config.inputs.x + 50,
+      50 + (config.leds.size + config.leds.space) * config.topology.cols + config.leds.space + 200 + config.inputs.x + 50,
     450, config.inputs.x, config.inputs.y))
-    self.inputCoulombsUpper.setText(str(config.settings[0]["coulombsUpper"]))
+    self.inputCoulombsUpper.setText(str(config.settings.get("coulombsUpper", 0)[0]))
     self.inputCoulombsUpper.textChanged.connect(partial(self.operate, "inputCoulombsUpper", "coulombs", "upper"))
 
     # intervals input
     self.labelIntervals = qw.QLabel(self.root)
     self.labelIntervals.setGeometry(qc.QRect(
-      50 + (config.leds.size + config.leds.space) * config.leds.cols + config.leds.space + 50,
+      50 + (config.leds.size + config.leds.space) * config.topology.cols + config.leds.space + 50,
     550, 100, 20))
     self.labelIntervals.setText("Intervals")
 
     self.inputIntervalLower = qw.QLineEdit(self.root)
     self.inputIntervalLower.setMaximumSize(qc.QSize(400, 50))
     self.inputIntervalLower.setGeometry(qc.QRect(
-      50 + (config.leds.size + config.leds.space) * config.leds.cols + config.leds.space + 50,
+      50 + (config.leds.size + config.leds.space) * config.topology.cols + config.leds.space + 50,
     600, config.inputs.x, config.inputs.y))
-    self.inputIntervalLower.setText(str(config.data.start))
+    self.inputIntervalLower.setText(str(config.topology.start))
     self.inputIntervalLower.textChanged.connect(partial(self.operate, "inputIntervalLower"))
     self.inputIntervalUpper = qw.QLineEdit(self.root)
     self.inputIntervalUpper.setMaximumSize(qc.QSize(400, 50))
     self.inputIntervalUpper.setGeometry(qc.QRect(
-      50 + (config.leds.size + config.leds.space) * config.leds.cols + config.leds.space + 50 + config.inputs.x + 50,
+      50 + (config.leds.size + config.leds.space) * config.topology.cols + config.leds.space + 50 + config.inputs.x + 50,
     600, config.inputs.x, config.inputs.y))
-    self.inputIntervalUpper.setText(str(config.data.stop))
+    self.inputIntervalUpper.setText(str(config.topology.end))
     self.inputIntervalUpper.textChanged.connect(partial(self.operate, "inputIntervalUpper"))
 
+    # timings
+    if config.pipeline.profiling:
+      self.timer = qc.QTimer(self)
+      self.timer.timeout.connect(lambda: self.statusBar().showMessage(f"cycle {self.shown} ({self.behind} behind)   {self.watchdog.status()}   {self.source.validator.status()}   {self.profiler.status()}"))
+      self.timer.start(1000)
+
+    if os.path.exists(config.profile):
+      try:
+        config.settings.load(config.profile)
+      except (OSError, ValueError) as error:
+        # a damaged profile mustn't keep the monitor from starting
+        print(f"PROFILE: CANNOT LOAD {config.profile} ({error}), USING DEFAULTS")
+        self.statusBar().showMessage(f"Profile not loaded, using defaults: {error}")
+
+    config.settings.subscribe(self.changed)
     self.update_all()
 
+    threading.Thread(target = self.warm_up, daemon = True).start()
+
   
   ## utility
+  def process(self, source: Source, data: np.array, sequence: int, arrival: float):
+    '''Runs a cycle of `source` through its pipelines, and shows it on the LEDs if it's the source on display.
+
+    The time from the cycle's `arrival` until its LEDs are updated is recorded as its latency.
+    '''
+
+    self.ready.wait()
+    frame = Frame(data, time = source.topology.time, dtype = config.pipeline.precision, sequence = sequence, arrival = arrival)
+
+    if source is not self.source:
+      with source.settings.lock:
+        frame = source.pipelines[0](frame)
+      source.values.fill(np.nan)
+      source.values[frame.channels] = frame.values
+      self.ingest.publish(source, source.values.tobytes())
+      return
+
+    if not self.watchdog.admit(sequence):
+      return
+
+    # the settings can't be swapped for a loaded profile part way through a cycle
+    with self.profiler.time("cycle") as cycle, source.settings.lock:
+      pipeline = source.pipelines[self.watchdog.decimate]
+      if self.watchdog.decimate != self.decimating:
+        # what the other pipeline tracks went stale while it was idle, so it starts afresh rather than jumping
+        pipeline.reset()
+        self.decimating = self.watchdog.decimate
+      start = time.perf_counter()
+      frame = pipeline(frame)
+      cost = time.perf_counter() - start
+      # plotted as processed, so the integral shown is the one judged
+      self.plot.feed(frame)
+      source.values.fill(np.nan)
+      source.values[frame.channels] = frame.values
+      self.data = source.values
+      self.ingest.publish(source, source.values.tobytes())
+
+      # levels before this cycle, as `judge` replaces the array rather than overwriting it
+      levels = self.alarms.level
+      changed = self.alarms.judge(source.values, *config.settings.thresholds())
+      if len(changed):
+        self.events.record(time.time(), changed, levels[changed], self.alarms.level[changed], source.values[changed], config.settings["unit"][changed])
+        self.mark(changed)
+
+      # channels gaining or losing a value are restyled whether or not their level changes
+      missing = np.isnan(source.values)
+      self.mark(np.flatnonzero(missing != self.missing))
+      self.missing = missing
+
+      # only LEDs changing colour are restyled, on the GUI thread as widgets mustn't be touched from this one,
+      # at most `config.leds.rate` times a second and never while the last repaint is still queued, so a busy GUI thread can't fall behind;
+      # LEDs changing in between stay stale until the next
+      now = time.monotonic()
+      if not self.painting and now - self.painted >= 1 / config.leds.rate:
+        # swapped out, so LEDs marked from another thread meanwhile land in one array or the other, never in between
+        with self.marking:
+          stale, self.stale = self.stale, self.spare
+        indices = np.flatnonzero(stale)
+        stale[:] = False
+        self.spare = stale
+        self.painting = True
+        self.painted = now
+        self.rendering.emit(indices, frame.arrival)
+
+    # cycles that have arrived since this one, which the display is behind by
+    self.shown = frame.sequence
+    self.behind = source.sequence - frame.sequence
+
+    self.watchdog.record(cycle.elapsed, cost)
+
+  def mark(self, indices = slice(None)) -> None:
+    '''Marks the LEDs at `indices`, or all of them if none are specified, to be restyled with the next repaint, from any thread.'''
+
+    with self.marking:
+      self.stale[indices] = True
+
+  def render(self, indices: np.array, arrival: float = None):
+    '''Restyles the LEDs at `indices` on the GUI thread, recording the latency of the cycle shown if it arrived at `arrival`.'''
+
+    with self.profiler.time("render"):
+      self.update_leds(indices)
+    self.painting = False
+    if arrival is not None:
+      self.profiler.record("latency", time.monotonic() - arrival)
+
+  def warm_up(self):
+    '''Builds the processing pipelines off the GUI thread, so SciPy is imported without delaying the window.'''
+
+    def build(settings, decimator = None, profiler = None):
+      return Pipeline.default(settings,
+        smoother = None if config.pipeline.smoothing is None else Smoother(**config.pipeline.smoothing),
+        decimator = decimator,
+        fused = config.pipeline.fused,
+        profiler = profiler,
+      )
+
+    decimators = [
+      None if config.pipeline.decimation is None else Decimator(**config.pipeline.decimation),
+      Decimator(config.watchdog.factor),
+    ]
+
+    # indexed by whether the watchdog wants frames decimated, which only the source on display is profiled and watched for
+    for source in config.sources:
+      profiler = self.profiler if source is self.source else None
+
+      if config.pipeline.workers is None:
+        source.pipelines = [build(source.settings, each, profiler) for each in decimators]
+      else:
+        source.pipelines = [
+          Sharded(partial(build, source.settings, each), workers = config.pipeline.workers, profiler = profiler)
+          for each in decimators
+        ]
+
+    self.pipelines = self.source.pipelines
+
+    # decimating only saves time where the stages after it do enough per sample, so both resolutions are timed with these settings
+    # for the watchdog to step down to the cheaper one, then forget the blank frames they processed
+    costs = []
+    for pipeline in self.pipelines:
+      blank = np.zeros(self.source.topology.shape, dtype = config.pipeline.precision)
+      pipeline(Frame(blank, time = self.source.topology.time))
+      start = time.perf_counter()
+      for _ in range(5):
+        pipeline(Frame(blank, time = self.source.topology.time))
+      costs.append((time.perf_counter() - start) / 5)
+      pipeline.reset()
+    self.watchdog.calibrate(*costs)
+    self.profiler.reset()
+
+    if (config.pipeline.decimation or {}).get("method") == "fir":
+      # FIR decimation imports SciPy's signal module on its first cycle, so it's imported here on purpose, in the background
+      importlib.import_module("scipy.signal")
+
+    # compile the fused kernel for the frame precision before the first cycle
+    if config.pipeline.fused:
+      integrate_classify(np.zeros((1, 2), dtype = config.pipeline.precision), [1], [0], [0], [2], [0], [0])
+
+    self.ready.set()
+
   def create_leds(self,
-    rows: int,
-    cols: int,
+    topology: Topology,
     *,
     size: tuple[int, int] = (config.leds.size,) * 2,
-    skip = [],
   ):
-    '''Automates creation of LED button elements.'''
-
-    offset = 0
-    for i in range(rows):
-      for k in range(cols):
-        idx = i * cols + k + 1
-        if idx in skip:
-          offset += 1
-          continue
-        idx -= offset
-
-        label = f"led{idx}"
-        led = vars(self)[label] = qw.QPushButton(self.ledGridWidget)
-        led.label = f"led{idx}"
-        led.setMaximumSize(qc.QSize(*size))
-        led.setObjectName(led.label)
-        led.setText(f"{idx}")
-        led.styleDict = {
-          "color": "rgb(255, 255, 255)",
-          "background-color": config.leds.style.col.idle,
-          "border": "transparent",
-          "border-color": "rgb(0, 0, 0)",
-          "border-width": "3px",
-        }
-        led.clicked.connect(partial(self.select, idx - 1))
-
-        self.ledGridLayout.addWidget(led, i, k, 1, 1)
+    '''Automates creation of LED button elements, one for each channel of `topology` with a grid position.'''
+
+    for i in map(int, topology.leds):
+      row, col = topology.positions[i]
+      idx = i + 1
+
+      label = f"led{idx}"
+      led = vars(self)[label] = qw.QPushButton(self.ledGridWidget)
+      led.label = f"led{idx}"
+      led.setMaximumSize(qc.QSize(*size))
+      led.setObjectName(led.label)
+      led.setText(f"{idx}")
+      led.styleDict = {
+        "color": "rgb(255, 255, 255)",
+        "background-color": config.leds.style.col.idle,
+        "border": "transparent",
+        "border-color": "rgb(0, 0, 0)",
+        "border-width": "3px",
+      }
+      led.clicked.connect(partial(self.select, i))
+
+      self.ledGridLayout.addWidget(led, row, col, 1, 1)
 
   def update_style(self, component):
     '''Updates stylesheet of `component` based on its `styleDict`.'''
 
-    component.setStyleSheet("; ".join(f"{key}:{value}" for key, value in component.styleDict.items()))
+    style = "; ".join(f"{key}:{value}" for key, value in component.styleDict.items())
+
+    # restyling makes Qt re-parse the sheet and repolish the widget, so skip it when nothing changed
+    if config.leds.renderer == "cached" and getattr(component, "styleString", None) == style:
+      return
+
+    component.styleString = style
+    component.setStyleSheet(style)
+
+  def show_text(self, component, value) -> None:
+    '''Shows `value` in the input `component`, unless it already holds that value.'''
+
+    try:
+      if value is not None and float(component.text()) == value:
+        return
+    except ValueError:
+      pass
+
+    component.blockSignals(True)
+    component.setText("" if value is None else str(value))
+    component.blockSignals(False)
 
   def update_all(self):
     '''Update appearances of LEDs and the current selection information.'''
 
-    # update leds
-    for i, each in enumerate(config.settings):
+    self.update_leds()
+    self.update_menu()
+
+  def update_leds(self, indices = None):
+    '''Update appearances of the LEDs at `indices`, or all of them if none are specified.'''
+
+    placed = config.topology.placed
+    indices = config.topology.leds if indices is None else [i for i in indices if placed[i]]
+    colours = None
+
+    if len(self.data):
+      try:
+        # debounced alarm levels rather than this cycle's states, so LEDs don't flicker about a threshold
+        colours = np.array([
+          config.leds.style.col.norm,
+          config.leds.style.col.concern,
+          config.leds.style.col.doom,
+        ])[self.alarms.level]
+        # a channel without a value counts as below every threshold, but isn't shown as fine
+        colours = np.where(np.isnan(self.data), config.leds.style.col.void, colours)
+      except Exception:
+        colours = [config.leds.style.col.crash] * len(config.topology)
+
+    select = config.settings["select"]
+    shown = config.settings["shown"]
+
+    for i in indices:
       led = vars(self)[f"led{i+1}"]
 
-      if self.data:
-        try:
-          led.styleDict["background-color"] = (
-            config.leds.style.col.idle if not config.connected else
-            config.leds.style.col.doom if sum(self.data[i]) > each[f"{each['unit']}Upper"] else
-            config.leds.style.col.concern if sum(self.data[i]) > each[f"{each['unit']}Lower"] else
-            config.leds.style.col.norm
-          )
-        except:
-          led.styleDict["background-color"] = config.leds.style.crash
-
-      if each["select"]:
+      if colours is not None:
+        led.styleDict["background-color"] = (
+          config.leds.style.col.idle if not config.connected else
+          colours[i]
+        )
+
+      if select[i]:
         led.styleDict["border-style"] = "solid"
         led.styleDict["border-color"] = "#000"
       else:
         led.styleDict["border-style"] = "transparent"
         
-      if each["shown"]:
+      if shown[i]:
         led.styleDict["opacity"] = 1
       else:
         led.styleDict["opacity"] = 0.5
 
       self.update_style(led)
 
-    # update menu
-    selection = [i for i, each in enumerate(config.settings) if each["select"]]
-    selected = len(selection)
-    self.selectedLabel.setText(
-      "Multiple Selected" if selected > 1 else
-      DataFilter.labels[selection[0]].upper() if selected == 1
-      else "-"
-    )
+  def update_menu(self, settings = None):
+    '''Update the current selection information, or only the inputs showing `settings` if specified.'''
+
+    selection = config.settings.selected()
+    common = lambda query: config.settings.common(query, selection)
+
+    if settings is None:
+      selected = len(selection)
+      self.selectedLabel.setText(
+        "Multiple Selected" if selected > 1 else
+        config.topology.labels[selection[0]].upper() if selected == 1
+        else "-"
+      )
+
+      self.checkboxShown.setEnabled(bool(selected))
+      self.plot.select(selection)
+      settings = set(Settings.fields.names)
 
-    self.checkboxShown.setEnabled(selected)
-    self.checkboxShown.setCheckState(all(each["shown"] for each in config.settings) * 2 or 1)
+    # update display
+    if "shown" in settings:
+      shown = common("shown")
+      self.checkboxShown.blockSignals(True)
+      self.checkboxShown.setCheckState(1 if shown is None else shown * 2)
+      self.checkboxShown.blockSignals(False)
 
     # update unit
-    unit = set(each["unit"] for each in config.settings if each["select"])
-    if len(unit) == 1:
-      unit = unit.pop()
-      vars(self)[f"radio{unit.capitalize()}"].setChecked(True)
-    else:
-      self.radioVolts.setChecked(False)
-      self.radioJoules.setChecked(False)
-      self.radioProtons.setChecked(False)
-      self.radioCoulombs.setChecked(False)
-
-    search = lambda query: set(each[query] for each in config.settings if each["select"])
-
-    lower = search("voltsLower")
-    self.inputVoltsLower.setText("" if len(lower) != 1 else str(lower.pop()))
-    lower = search("joulesLower")
-    self.inputJoulesLower.setText("" if len(lower) != 1 else str(lower.pop()))
-    lower = search("protonsLower")
-    self.inputProtonsLower.setText("" if len(lower) != 1 else str(lower.pop()))
-    lower = search("coulombsLower")
-    self.inputCoulombsLower.setText("" if len(lower) != 1 else str(lower.pop()))
-    
-    upper = search("voltsUpper")
-    self.inputVoltsUpper.setText("" if len(upper) != 1 else str(upper.pop()))
-    upper = search("joulesUpper")
-    self.inputJoulesUpper.setText("" if len(upper) != 1 else str(upper.pop()))
-    upper = search("protonsUpper")
-    self.inputProtonsUpper.setText("" if len(upper) != 1 else str(upper.pop()))
-    upper = search("coulombsUpper")
-    self.inputCoulombsUpper.setText("" if len(upper) != 1 else str(upper.pop()))
-
-    # update intervals
-    lower = search("intervalLower")
-    self.inputIntervalLower.setText("" if len(lower) != 1 else str(lower.pop()))
-    upper = search("intervalUpper")
-    self.inputIntervalUpper.setText("" if len(upper) != 1 else str(upper.pop()))
+    if "unit" in settings:
+      unit = common("unit")
+      if unit is not None:
+        vars(self)[f"radio{Settings.units[unit].capitalize()}"].setChecked(True)
+      else:
+        for each in Settings.units:
+          radio = vars(self)[f"radio{each.capitalize()}"]
+          radio.setAutoExclusive(False)
+          radio.setChecked(False)
+          radio.setAutoExclusive(True)
+
+    # update thresholds and intervals
+    for setting in settings:
+      if setting.endswith(("Lower", "Upper")):
+        self.show_text(vars(self)[f"input{setting[0].upper() + setting[1:]}"], common(setting))
 
   
   ## event handlers
+  def changed(self, setting, indices):
+    '''Refresh only the parts of the GUI showing a setting that changed.'''
+
+    match setting:
+      case None:
+        self.update_all()
+
+      case "select":
+        self.update_leds(indices)
+        self.update_menu()
+
+      case "shown":
+        self.update_leds(indices)
+        self.update_menu({setting})
+
+      case "unit":
+        self.update_leds(indices)
+        self.update_menu({setting})
+
+      case _ if setting.endswith(("Lower", "Upper")):
+        if not setting.startswith("interval"):
+          self.update_leds(indices)
+        self.update_menu({setting})
+
   def select(self, label):
     '''Handle response to an LED button being clicked.'''
 
-    selected = config.settings[label]["select"]
+    selected = config.settings.get("select", label)[0]
     if not config.multiselect and not selected:
-      for each in config.settings:
-        each["select"] = False
-    config.settings[label]["select"] = not selected
-    
-    self.update_all()
+      config.settings.set("select", False)
+    config.settings.set("select", not selected, label)
 
   def operate(self, label, *args):
     '''Handle response to a button with `label` being clicked.'''
 
     button = vars(self)[label]
+    selection = config.settings.selected()
 
     match label:
       case "buttonSelect":
@@ -473,23 +832,20 @@ class Core(qw.QMainWindow):
         button.setText("Cancel" if button.state else "Select")
 
         if not button.state:
-          for each in config.settings:
-            each["select"] = False
+          config.settings.set("select", False)
         
         self.buttonSelectAll.setEnabled(button.state)
         self.buttonSelectAll.setText("Select All")
 
       case "buttonSelectAll":
         button.state = not button.state
-        for each in config.settings:
-          each["select"] = button.state
+        config.settings.set("select", button.state)
         button.setText("Deselect All" if button.state else "Select All")
 
       case "buttonConnect":
         if button.state:
           try:
-            self.client.loop_stop()
-            self.client.disconnect()
+            self.ingest.disconnect()
           except:
             raise
           else:
@@ -498,43 +854,47 @@ class Core(qw.QMainWindow):
         
         else:
           try:
-            self.client.connect("130.246.57.45", 8883, 60)
-            self.client.loop_start()
+            self.alarms.reset()
+            self.mark()
+            self.ingest.connect()
           except:
             raise
           else:
             button.state = True
             button.setText("Disconnect")
 
-      case "checkboxShown":        
-        for each in config.settings:
-          if each["select"]:
-            each["shown"] = self.checkboxShown.checkState()
+        self.update_leds()
 
-      case "radioVolts" | "radioJoules" | "radioProtons" | "radioCoulombs":
-        for each in config.settings:
-          if each["select"]:
-            each["unit"] = label[5:].lower()
+      case "buttonSave":
+        path, _ = qw.QFileDialog.getSaveFileName(self, "Save Profile", config.profile, "Profiles (*.npy)")
+        if path:
+          try:
+            config.settings.save(path)
+          except OSError as error:
+            qw.QMessageBox.warning(self, "Save Profile", f"Could not save the profile to {path}:\n{error}")
 
-      case "inputIntervalLower":
-        for each in config.settings:
-          if each["select"]:
-            each["intervalLower"] = self.inputIntervalLower.text()
+      case "buttonLoad":
+        path, _ = qw.QFileDialog.getOpenFileName(self, "Load Profile", config.profile, "Profiles (*.npy)")
+        if path:
+          try:
+            config.settings.load(path)
+          except (OSError, ValueError) as error:
+            qw.QMessageBox.warning(self, "Load Profile", f"Could not load {path}, the settings are unchanged:\n{error}")
 
-      case "inputIntervalUpper":
-        for each in config.settings:
-          if each["select"]:
-            each["intervalUpper"] = self.inputIntervalUpper.text()
+      case "checkboxShown":
+        config.settings.set("shown", bool(self.checkboxShown.checkState()), selection)
+
+      case "radioVolts" | "radioJoules" | "radioProtons" | "radioCoulombs":
+        config.settings.set("unit", label[5:].lower(), selection)
 
       case _:
-        # thresholds
+        # thresholds and intervals
         if label.startswith("input"):
-          for each in config.settings:
-            if each["select"]:
-              setting = f"{args[0]}{args[1].capitalize()}"
-              each[setting] = vars(self)[f"input{setting[0].upper() + setting[1:]}"].text()
-
-    self.update_all()
+          try:
+            value = float(button.text())
+          except ValueError:
+            return
+          config.settings.set(label[5].lower() + label[6:], value, selection)
 
 
 ### execution
@@ -546,4 +906,10 @@ if __name__ == "__main__":
   core = Core(queue)
   core.show()
 
-  sys.exit(root.exec())
+  status = root.exec()
+  core.ingest.close()
+  core.events.close()
+  if config.pipeline.profiling:
+    core.profiler.dump()
+
+  sys.exit(status)
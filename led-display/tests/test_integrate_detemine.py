@@ -0,0 +1,69 @@
+'''
+The legacy processors' judgements at the thresholds, and their results against those on the time axis they used to integrate over.
+'''
+
+import numpy as np
+import pytest
+
+from data_handling import integrate_detemine
+from data_handling.topology import ring
+
+from benchmarks.frames import load_cycles, synthetic, recorded
+
+
+# the time axis the legacy processors integrated over before they took the topology's
+legacy = np.linspace(-1.5, 10.5, ring.points)
+
+
+@pytest.fixture(scope = "module", params = ["synthetic", "recorded"])
+def frame(request) -> np.ndarray:
+  '''One cycle, synthetic or recorded.'''
+
+  if request.param == "synthetic":
+    return synthetic(1)[0]
+
+  cycles = load_cycles(recorded, limit = 1)
+  if not cycles:
+    pytest.skip("no recorded cycles found")
+  return cycles[0]
+
+
+def judge(integrals, t1 = -0.05, t2 = 0.008) -> list[int]:
+  processor = integrate_detemine.VoltProcessor(None, t1, t2)
+  processor.integration_by_row = np.asarray(integrals, dtype = float)
+  processor.judge()
+  return processor.judgement.tolist()
+
+
+def test_judge_thresholds():
+  # below, at, between, at and above the thresholds
+  assert judge([-1.0, -0.05, 0.0, 0.008, 1.0]) == [0, 0, 1, 2, 2]
+
+
+def test_judge_per_channel_thresholds():
+  assert judge([0.008, 0.01, 0.0], t1 = np.full(3, -0.05), t2 = np.array([0.008, 0.01, 0.0])) == [2, 2, 2]
+
+
+def test_judge_nan_is_bad():
+  assert judge([np.nan, 0.0, np.nan]) == [2, 1, 2]
+  assert integrate_detemine.VoltProcessor.categories[judge([np.nan])[0]] == "bad"
+
+
+@pytest.mark.parametrize("unit, processor", [
+  ("v", integrate_detemine.VoltProcessor),
+  ("p", integrate_detemine.ProtonProcessor),
+  ("c", integrate_detemine.ColoumbProcessor),
+  ("J", integrate_detemine.JouleProcessor),
+])
+def test_legacy_axis(frame, unit, processor):
+  # on a uniform grid a trapezoid scales with the spacing, so moving to the topology's axis should only rescale the integrals
+  scale = ring.dx / (legacy[1] - legacy[0])
+  before = processor(frame, coef = integrate_detemine.calibration(), time = legacy).integrate_by_unit()
+
+  np.testing.assert_allclose(integrate_detemine.live_int(frame, unit), before * scale, rtol = 1e-9, atol = 1e-12 * np.abs(before).max())
+  np.testing.assert_allclose(integrate_detemine.live_int_row(frame, unit), before.sum(axis = 1) * scale, rtol = 1e-9)
+
+  if unit == "v":
+    # the same categories as before, with the thresholds rescaled alike
+    old = processor(frame, -0.05 / scale, 0.008 / scale, time = legacy).judging()
+    assert np.array_equal(integrate_detemine.lv5judge(frame, -0.05, 0.008, unit), old)
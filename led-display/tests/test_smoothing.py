@@ -0,0 +1,46 @@
+'''
+Streamed smoothing, whose filter state is carried per channel from one cycle to the next.
+'''
+
+import numpy as np
+
+from data_handling.smoothing import Smoother
+
+
+rng = np.random.default_rng(0)
+high, low, other = (rng.normal(mean, 1, (1, 400)) for mean in (5, -5, 0))
+
+
+def fresh(data: np.ndarray) -> np.ndarray:
+  return Smoother("iir", alpha = 0.1).apply(data)
+
+
+def test_swapped_channels_keep_their_own_state():
+  smoother = Smoother("iir", alpha = 0.1, stream = True)
+  first = smoother.apply(np.vstack([high, low]), [0, 1])
+
+  # channel 1 deactivated and 2 activated in its place, with as many rows as before
+  out = smoother.apply(np.vstack([high, other]), [0, 2])
+
+  alone = Smoother("iir", alpha = 0.1, stream = True)
+  alone.apply(high)
+  np.testing.assert_allclose(out[0], alone.apply(high)[0])
+  np.testing.assert_allclose(out[1], fresh(other)[0])
+  assert not np.allclose(first[1], out[1])
+
+
+def test_reactivated_channel_starts_afresh():
+  smoother = Smoother("iir", alpha = 0.1, stream = True)
+  smoother.apply(np.vstack([high, low]), [0, 1])
+  smoother.apply(high, [0])
+
+  out = smoother.apply(np.vstack([high, low]), [0, 1])
+  np.testing.assert_allclose(out[1], fresh(low)[0])
+
+
+def test_reset_forgets_every_channel():
+  smoother = Smoother("iir", alpha = 0.1, stream = True)
+  smoother.apply(np.vstack([high, low]), [0, 1])
+  smoother.reset()
+
+  np.testing.assert_allclose(smoother.apply(np.vstack([high, low]), [0, 1]), fresh(np.vstack([high, low])))
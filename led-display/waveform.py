@@ -0,0 +1,238 @@
+import threading
+
+import numpy as np
+
+from PyQt5 import QtCore as qc
+from PyQt5 import QtGui as qg
+from PyQt5 import QtWidgets as qw
+
+from data_handling.topology import Topology
+from data_handling.pipeline import Frame
+from data_handling.envelope import Envelope
+
+
+class Waveform(qw.QWidget):
+  '''Live traces of the selected channels, above their cumulative integrals, redrawn at most `rate` times a second.
+
+  Traces are plotted as the pipeline filtered them, and each integral is the trapezoid over the channel's integration window, marked on both panels,
+  so it ends at the value the channel's LED is judged on.
+  Processed frames are handed over by `feed` from any thread, which copies only the plotted channels into a preallocated buffer.
+  On each tick of a timer on the GUI thread, the newest cycle is scaled straight into the vertices of each curve's preallocated `QPolygonF`
+  through a NumPy view of them, and the widget repainted; cycles arriving between ticks are never drawn.
+  Where the panels are narrower than half a trace's samples, each curve is drawn as its `Envelope`, two points a pixel column.
+  '''
+
+  colours = ("#1f77b4", "#d62728", "#2ca02c", "#9467bd", "#ff7f0e", "#17becf")
+  titles = ("filtered trace", "integral over window")
+  margin = 8
+  # space above and below the curves in each panel, for its labels
+  inset = 18
+
+
+  def __init__(self, topology: Topology, parent: qw.QWidget = None, *, curves = 4, rate = 25):
+    '''`curves`: most channels plotted at once, the first selected.
+    `rate`: most repaints a second, at most the display's refresh rate.
+    '''
+
+    super().__init__(parent)
+
+    self.topology = topology
+    self.curves = curves
+
+    self.lock = threading.Lock()
+    self.channels = np.empty(0, dtype = np.intp)
+    self.traces = np.zeros((curves, topology.points))
+    self.integrals = np.zeros((curves, topology.points))
+    # integration window of each curve as sample indices
+    self.starts = np.zeros(curves, dtype = np.intp)
+    self.stops = np.zeros(curves, dtype = np.intp)
+    # curves holding a cycle, their channels (those plotted the pipeline kept), the cycle's number, and whether one arrived since the last repaint
+    self.count = 0
+    self.plotted = np.empty(0, dtype = np.intp)
+    self.sequence = 0
+    self.fresh = False
+
+    # pixel columns of each panel, and the envelopes of the traces and the integrals drawn across them
+    self.columns = 0
+    self.envelopes = [Envelope(topology.points) for _ in Waveform.titles]
+
+    # a trace and an integral polygon per curve, with NumPy views of their vertices as rows of x and y, sized in `_layout_`
+    self.polygons = []
+    self.vertices = []
+
+    # what the last repaint shows: curves, their labels and windows' x, and each panel's range
+    self.drawn = 0
+    self.labels = []
+    self.bounds = []
+    self.ranges = [(0.0, 0.0) for _ in Waveform.titles]
+    self.panels = []
+    self._layout_()
+
+    self.timer = qc.QTimer(self)
+    self.timer.timeout.connect(self.refresh)
+    self.timer.start(round(1000 / rate))
+
+  def select(self, channels: np.array) -> None:
+    '''Plots the first `curves` of `channels` from the next cycle fed.'''
+
+    with self.lock:
+      self.channels = np.asarray(channels, dtype = np.intp)[:self.curves]
+      self.count = 0
+      self.fresh = True
+
+  def feed(self, frame: Frame) -> None:
+    '''Takes a frame a pipeline has processed, copying the samples and windows of the channels plotted; safe to call from any thread.
+
+    Any coefficients the pipeline left unapplied are applied to the copies, and a decimated frame is interpolated back to full resolution.
+    Envelopes are cached by `frame.sequence`, or cycles numbered as they're fed if it's `None`.
+    '''
+
+    with self.lock:
+      if self.traces.dtype != frame.data.dtype:
+        # kept in the precision frames are processed in, so copying them never converts
+        self.traces = np.zeros(self.traces.shape, dtype = frame.data.dtype)
+
+      count = 0
+      plotted = []
+      for part in frame.parts or [frame]:
+        # rows of the part holding channels plotted, of those its pipeline kept
+        rows = np.flatnonzero(np.isin(part.channels, self.channels))
+        for row in rows.tolist():
+          trace = self.traces[count]
+          if len(part.time) == self.topology.points:
+            trace[:] = part.data[row]
+          else:
+            trace[:] = np.interp(self.topology.time, part.time, part.data[row])
+
+          if part.coefficients is not None:
+            gain, offset = part.coefficients
+            trace *= gain[row]
+            trace += offset[row]
+
+          if part.windows is None:
+            self.starts[count], self.stops[count] = 0, self.topology.points
+          else:
+            # the window's times, as indices of the full resolution samples
+            starts, stops = part.windows
+            span = part.time[[min(starts[row], len(part.time) - 1), max(stops[row] - 1, 0)]]
+            self.starts[count], last = np.searchsorted(self.topology.time, span)
+            self.stops[count] = max(last + 1, self.starts[count]) if stops[row] > starts[row] else self.starts[count]
+
+          plotted.append(part.channels[row])
+          count += 1
+
+      self.count = count
+      self.plotted = np.array(plotted, dtype = np.intp)
+      self.sequence = self.sequence + 1 if frame.sequence is None else frame.sequence
+      self.fresh = True
+
+  def refresh(self) -> None:
+    '''Scales the newest cycle into the curves' vertices and schedules a repaint, if a cycle arrived since the last one.'''
+
+    if not self.fresh or not self.isVisible():
+      return
+
+    with self.lock:
+      count = self.count
+
+      # cumulative trapezoid over each window, zero before it and holding its total after, as `integrate_windows` sums it
+      for j in range(count):
+        start, stop = self.starts[j], self.stops[j]
+        integral = self.integrals[j]
+        integral[:start] = 0
+        if stop - start >= 2:
+          window = self.traces[j, start:stop]
+          np.cumsum(window, out = integral[start:stop])
+          integral[start:stop] -= (window[0] + window) / 2
+          integral[start:stop] *= self.topology.dx
+          integral[stop:] = integral[stop - 1]
+        else:
+          integral[start:] = 0
+
+      keys = [(channel, self.sequence) for channel in self.plotted.tolist()]
+
+      for i, (values, rect, envelope) in enumerate(zip((self.traces, self.integrals), self.panels, self.envelopes)):
+        if count:
+          curves = envelope.get(values[:count], self.columns, keys) if envelope.reduces(self.columns) else values[:count]
+          # an envelope keeps every extreme, so the range is the same as the full traces'
+          lower, upper = min(float(each.min()) for each in curves), max(float(each.max()) for each in curves)
+          self.ranges[i] = (lower, upper)
+          scale = (rect.height() - 2 * Waveform.inset) / ((upper - lower) or 1.0)
+          for j, curve in enumerate(curves):
+            y = self.vertices[j][i][:, 1]
+            np.multiply(curve, -scale, out = y)
+            y += rect.top() + Waveform.inset + upper * scale
+
+      self.drawn = count
+      self.labels = [self.topology.labels[each].upper() for each in self.plotted.tolist()]
+      # x of each window's first and last sample
+      time, scale = self.topology.time, self.columns / (self.topology.end - self.topology.start)
+      self.bounds = [
+        [Waveform.margin + (time[min(index, len(time) - 1)] - self.topology.start) * scale for index in (self.starts[j], max(self.stops[j] - 1, self.starts[j]))]
+        for j in range(count)
+      ]
+      self.fresh = False
+
+    self.update()
+
+  def paintEvent(self, event) -> None:
+    painter = qg.QPainter(self)
+    painter.fillRect(self.rect(), qc.Qt.white)
+
+    painter.setPen(qg.QColor("#888"))
+    for title, rect, (lower, upper) in zip(Waveform.titles, self.panels, self.ranges):
+      painter.drawRect(rect)
+      painter.drawText(rect.adjusted(4, 2, -4, -2), qc.Qt.AlignLeft | qc.Qt.AlignTop, f"{title}   {upper:.4g}")
+      painter.drawText(rect.adjusted(4, 2, -4, -2), qc.Qt.AlignLeft | qc.Qt.AlignBottom, f"{lower:.4g}")
+
+    for j in range(self.drawn):
+      colour = qg.QColor(Waveform.colours[j % len(Waveform.colours)])
+      painter.setPen(colour)
+      for polygon in self.polygons[j]:
+        painter.drawPolyline(polygon)
+      painter.drawText(self.panels[0].adjusted(4, 2 + 16 * j, -4, -2), qc.Qt.AlignRight | qc.Qt.AlignTop, self.labels[j])
+
+      # the integration window, on both panels
+      painter.setPen(qg.QPen(colour, 1, qc.Qt.DashLine))
+      for rect in self.panels:
+        for x in self.bounds[j]:
+          painter.drawLine(qc.QPointF(x, rect.top()), qc.QPointF(x, rect.bottom()))
+
+    painter.end()
+
+  def resizeEvent(self, event) -> None:
+    self._layout_()
+    self.fresh = True
+    self.refresh()
+
+  def _layout_(self) -> None:
+    '''A minor inner method to stack the panels to fill the widget, and allocate the curves' vertices with each x at its sample's time,
+    or at its pixel column's if drawn as envelopes.
+    '''
+
+    width = max(self.width() - 2 * Waveform.margin, 1)
+    height = max((self.height() - 3 * Waveform.margin) // len(Waveform.titles), 1)
+    self.panels = [
+      qc.QRectF(Waveform.margin, Waveform.margin + i * (height + Waveform.margin), width, height)
+      for i in range(len(Waveform.titles))
+    ]
+
+    self.columns = width
+    if self.envelopes[0].reduces(width):
+      x = Waveform.margin + np.repeat(np.arange(width) + 0.5, 2)
+    else:
+      x = Waveform.margin + (self.topology.time - self.topology.start) * (width / (self.topology.end - self.topology.start))
+
+    self.polygons = [[qg.QPolygonF(len(x)) for _ in Waveform.titles] for _ in range(self.curves)]
+    self.vertices = [[self._vertices_(polygon) for polygon in pair] for pair in self.polygons]
+    for pair in self.vertices:
+      for vertices in pair:
+        vertices[:, 0] = x
+
+  @staticmethod
+  def _vertices_(polygon: qg.QPolygonF) -> np.ndarray:
+    '''A minor inner method to view the points of `polygon` as an array of rows of x and y, writable in place.'''
+
+    pointer = polygon.data()
+    pointer.setsize(polygon.size() * 2 * np.dtype(np.float64).itemsize)
+    return np.frombuffer(pointer, dtype = np.float64).reshape(polygon.size(), 2)